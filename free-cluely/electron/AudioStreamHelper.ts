@@ -0,0 +1,255 @@
+// AudioStreamHelper.ts
+
+import { AppState } from "./main"
+import { getWorkerPool, toTransferable } from "./WorkerPoolHelper"
+import { isAbortError } from "./SchedulerHelper"
+
+// Voice-activity detection tuning
+const FRAME_MS = 20
+const PREROLL_MS = 300 // silence kept before speech so first syllables are not clipped
+const HANGOVER_MS = Number(process.env.AUDIO_VAD_SILENCE_MS) || 800 // silence that ends a segment
+const MIN_SEGMENT_MS = 500 // shorter voiced bursts (clicks, coughs) are dropped
+const MAX_SEGMENT_MS = Number(process.env.AUDIO_MAX_SEGMENT_MS) || 20000 // long speech is cut here
+const MIN_SPEECH_RMS = 500 // absolute floor on 16-bit RMS
+const SPEECH_TO_NOISE_RATIO = 3
+// Sample rates accepted from the renderer (telephone quality to 48 kHz)
+const MIN_SAMPLE_RATE = 8000
+const MAX_SAMPLE_RATE = 48000
+
+export interface AudioSegmentResult {
+  sessionId: string
+  index: number
+  text: string
+  timestamp: number
+  durationMs: number
+}
+
+// Fixed-capacity ring of 16-bit samples; memory stays bounded however long
+// the recording runs
+export class PcmRingBuffer {
+  private samples: Int16Array
+  private start = 0
+  private size = 0
+
+  constructor(capacity: number) {
+    this.samples = new Int16Array(capacity)
+  }
+
+  public get length(): number {
+    return this.size
+  }
+
+  public get capacity(): number {
+    return this.samples.length
+  }
+
+  // Overwrites the oldest samples once full
+  public write(data: Int16Array): void {
+    for (let i = 0; i < data.length; i++) {
+      const index = (this.start + this.size) % this.samples.length
+      this.samples[index] = data[i]
+      if (this.size < this.samples.length) this.size++
+      else this.start = (this.start + 1) % this.samples.length
+    }
+  }
+
+  // Keeps only the newest `count` samples
+  public keepLast(count: number): void {
+    if (this.size <= count) return
+    this.start = (this.start + this.size - count) % this.samples.length
+    this.size = count
+  }
+
+  public drain(): Int16Array {
+    const out = new Int16Array(this.size)
+    for (let i = 0; i < this.size; i++) {
+      out[i] = this.samples[(this.start + i) % this.samples.length]
+    }
+    this.start = 0
+    this.size = 0
+    return out
+  }
+}
+
+function rms(frame: Int16Array): number {
+  let sum = 0
+  for (let i = 0; i < frame.length; i++) sum += frame[i] * frame[i]
+  return Math.sqrt(sum / Math.max(1, frame.length))
+}
+
+// 16-bit mono PCM wrapped in a WAV container
+export function encodeWav(samples: Int16Array, sampleRate: number): Buffer {
+  const header = Buffer.alloc(44)
+  const dataSize = samples.length * 2
+  header.write("RIFF", 0)
+  header.writeUInt32LE(36 + dataSize, 4)
+  header.write("WAVE", 8)
+  header.write("fmt ", 12)
+  header.writeUInt32LE(16, 16) // PCM chunk size
+  header.writeUInt16LE(1, 20) // PCM format
+  header.writeUInt16LE(1, 22) // mono
+  header.writeUInt32LE(sampleRate, 24)
+  header.writeUInt32LE(sampleRate * 2, 28) // byte rate
+  header.writeUInt16LE(2, 32) // block align
+  header.writeUInt16LE(16, 34) // bits per sample
+  header.write("data", 36)
+  header.writeUInt32LE(dataSize, 40)
+  return Buffer.concat([header, Buffer.from(samples.buffer, samples.byteOffset, dataSize)])
+}
+
+function toInt16(chunk: ArrayBuffer | ArrayBufferView): Int16Array {
+  const bytes = chunk instanceof ArrayBuffer
+    ? new Uint8Array(chunk)
+    : new Uint8Array(chunk.buffer, chunk.byteOffset, chunk.byteLength)
+  // Copy so the view is 2-byte aligned regardless of the source offset
+  const aligned = bytes.slice(0, bytes.length - (bytes.length % 2))
+  return new Int16Array(aligned.buffer)
+}
+
+class AudioStreamSession {
+  private ring: PcmRingBuffer
+  private pendingFrame: Int16Array
+  private pendingLength = 0
+  private frameSamples: number
+  private inSpeech = false
+  private voicedSamples = 0
+  private silentFrames = 0
+  private noiseFloor = MIN_SPEECH_RMS / SPEECH_TO_NOISE_RATIO
+  private segmentIndex = 0
+  private submissions: Promise<AudioSegmentResult | null>[] = []
+
+  constructor(
+    public readonly id: string,
+    private readonly sampleRate: number,
+    private readonly submit: (index: number, samples: Int16Array) => Promise<AudioSegmentResult | null>
+  ) {
+    this.frameSamples = Math.round((sampleRate * FRAME_MS) / 1000)
+    this.pendingFrame = new Int16Array(this.frameSamples)
+    this.ring = new PcmRingBuffer(Math.ceil((sampleRate * (MAX_SEGMENT_MS + PREROLL_MS)) / 1000))
+  }
+
+  public push(samples: Int16Array): void {
+    let offset = 0
+    while (offset < samples.length) {
+      const take = Math.min(this.frameSamples - this.pendingLength, samples.length - offset)
+      this.pendingFrame.set(samples.subarray(offset, offset + take), this.pendingLength)
+      this.pendingLength += take
+      offset += take
+      if (this.pendingLength === this.frameSamples) {
+        this.processFrame(this.pendingFrame.slice())
+        this.pendingLength = 0
+      }
+    }
+  }
+
+  // Flushes any speech still buffered and waits for every segment's answer
+  public async finish(): Promise<AudioSegmentResult[]> {
+    if (this.inSpeech) this.endSegment()
+    const results = await Promise.all(this.submissions)
+    return results.filter((result): result is AudioSegmentResult => result !== null)
+  }
+
+  private processFrame(frame: Int16Array): void {
+    const energy = rms(frame)
+    const isSpeech = energy > Math.max(MIN_SPEECH_RMS, this.noiseFloor * SPEECH_TO_NOISE_RATIO)
+
+    if (!isSpeech) {
+      // Track background noise slowly so the threshold adapts to the room
+      this.noiseFloor = this.noiseFloor * 0.95 + energy * 0.05
+    }
+
+    if (!this.inSpeech) {
+      this.ring.write(frame)
+      if (isSpeech) {
+        this.inSpeech = true
+        this.voicedSamples = frame.length
+        this.silentFrames = 0
+      } else {
+        // Silence is dropped except for the short pre-roll
+        this.ring.keepLast(Math.round((this.sampleRate * PREROLL_MS) / 1000))
+      }
+      return
+    }
+
+    this.ring.write(frame)
+    this.silentFrames = isSpeech ? 0 : this.silentFrames + 1
+    if (isSpeech) this.voicedSamples += frame.length
+
+    const segmentMs = (this.ring.length / this.sampleRate) * 1000
+    if (this.silentFrames * FRAME_MS >= HANGOVER_MS || segmentMs >= MAX_SEGMENT_MS) {
+      this.endSegment()
+    }
+  }
+
+  private endSegment(): void {
+    const samples = this.ring.drain()
+    const voicedMs = (this.voicedSamples / this.sampleRate) * 1000
+    this.inSpeech = false
+    this.voicedSamples = 0
+    this.silentFrames = 0
+
+    if (voicedMs < MIN_SEGMENT_MS) return
+    this.submissions.push(this.submit(this.segmentIndex++, samples))
+  }
+}
+
+// Receives microphone audio as binary PCM chunks over IPC, drops silence and
+// submits each spoken segment for analysis while recording continues.
+export class AudioStreamHelper {
+  private appState: AppState
+  private sessions = new Map<string, AudioStreamSession>()
+  private nextId = 0
+
+  constructor(appState: AppState) {
+    this.appState = appState
+  }
+
+  public start(sampleRate: number, onSegment: (result: AudioSegmentResult) => void): string {
+    // The rate sizes the VAD frames and the ring buffer: a rate too low for a
+    // single sample per frame would stall push() on the first chunk
+    if (!Number.isInteger(sampleRate) || sampleRate < MIN_SAMPLE_RATE || sampleRate > MAX_SAMPLE_RATE) {
+      throw new Error(`Unsupported sample rate ${sampleRate}: expected an integer from ${MIN_SAMPLE_RATE} to ${MAX_SAMPLE_RATE} Hz`)
+    }
+    const id = `audio-${Date.now()}-${this.nextId++}`
+    const session = new AudioStreamSession(id, sampleRate, async (index, samples) => {
+      try {
+        const wav = encodeWav(samples, sampleRate)
+        const buffer = toTransferable(wav)
+        const data = await getWorkerPool().run<string>({ kind: "encode-buffer", buffer }, [buffer])
+        const { text, timestamp } = await this.appState.processingHelper.processAudioBase64(data, "audio/wav")
+        const result = {
+          sessionId: id,
+          index,
+          text,
+          timestamp,
+          durationMs: Math.round((samples.length / sampleRate) * 1000)
+        }
+        onSegment(result)
+        return result
+      } catch (error: any) {
+        if (!isAbortError(error)) console.error(`[AudioStreamHelper] Segment ${index} failed:`, error)
+        return null
+      }
+    })
+    this.sessions.set(id, session)
+    return id
+  }
+
+  // Chunks carry 16-bit little-endian mono PCM at the session's sample rate
+  public push(sessionId: string, chunk: ArrayBuffer | ArrayBufferView): void {
+    this.sessions.get(sessionId)?.push(toInt16(chunk))
+  }
+
+  public async stop(sessionId: string): Promise<AudioSegmentResult[]> {
+    const session = this.sessions.get(sessionId)
+    if (!session) return []
+    this.sessions.delete(sessionId)
+    return session.finish()
+  }
+
+  // Ends a session whose renderer is gone: buffered audio is dropped and
+  // segments already submitted finish without a listener
+  public discard(sessionId: string): void {
+    this.sessions.delete(sessionId)
+  }
+}
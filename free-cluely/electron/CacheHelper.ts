@@ -0,0 +1,202 @@
+// CacheHelper.ts
+
+import crypto from "node:crypto"
+import fs from "node:fs"
+import path from "node:path"
+
+export interface ResponseCacheOptions {
+  maxEntries: number
+  ttlMs: number
+  // 0 requires identical images. Above 0, images whose perceptual hashes differ
+  // in at most this many bits also count as the same screen (opt-in: small
+  // edits such as one changed number are not visible to the perceptual hash)
+  maxHammingDistance: number
+  // Directory for the on-disk store; memory only when omitted
+  persistDir?: string
+}
+
+export interface ResponseCacheKey {
+  provider: string
+  model: string
+  template: string
+  // Exact inputs: prompt text, audio data, etc.
+  inputs: string[]
+  // Content hashes (hex) of each image, in order
+  imageHashes: string[]
+  // Perceptual hashes (hex) of each image, for near-duplicate matching
+  perceptualHashes?: string[]
+}
+
+interface CacheEntry {
+  exactKey: string
+  imageHashes: string[]
+  perceptualHashes?: string[]
+  value: any
+  createdAt: number
+}
+
+export interface ResponseCacheStats {
+  hits: number
+  nearHits: number
+  misses: number
+  entries: number
+}
+
+// v1 entries were keyed by a coarse 64-bit perceptual hash alone and could
+// hold answers to a different screen, so they are discarded
+const PERSIST_FILE = "llm-response-cache-v2.json"
+const LEGACY_PERSIST_FILE = "llm-response-cache.json"
+const PERSIST_DELAY_MS = 1000
+
+export function sha256(data: string | Buffer): string {
+  return crypto.createHash("sha256").update(data).digest("hex")
+}
+
+// Number of differing bits between two equal-length hex hashes
+export function hammingDistance(a: string, b: string): number {
+  if (a.length !== b.length) return Infinity
+  let distance = 0
+  for (let i = 0; i < a.length; i++) {
+    let diff = parseInt(a[i], 16) ^ parseInt(b[i], 16)
+    while (diff) {
+      distance += diff & 1
+      diff >>= 1
+    }
+  }
+  return distance
+}
+
+export class ResponseCache {
+  private options: ResponseCacheOptions
+  // Map iteration order doubles as LRU order: oldest first
+  private entries = new Map<string, CacheEntry>()
+  private stats = { hits: 0, nearHits: 0, misses: 0 }
+  private persistTimer: NodeJS.Timeout | null = null
+
+  constructor(options: ResponseCacheOptions) {
+    this.options = options
+    this.load()
+  }
+
+  public get(key: ResponseCacheKey): any | undefined {
+    const exactKey = this.exactKeyFor(key)
+    const now = Date.now()
+    let nearest: { id: string; entry: CacheEntry; distance: number } | null = null
+
+    for (const [id, entry] of this.entries) {
+      if (entry.exactKey !== exactKey) continue
+      if (now - entry.createdAt > this.options.ttlMs) {
+        this.entries.delete(id)
+        continue
+      }
+
+      const distance = this.imageDistance(entry, key)
+      if (distance <= this.options.maxHammingDistance && (!nearest || distance < nearest.distance)) {
+        nearest = { id, entry, distance }
+      }
+    }
+
+    if (!nearest) {
+      this.stats.misses++
+      return undefined
+    }
+
+    this.stats.hits++
+    if (nearest.distance > 0) this.stats.nearHits++
+
+    // Refresh recency
+    this.entries.delete(nearest.id)
+    this.entries.set(nearest.id, nearest.entry)
+    return nearest.entry.value
+  }
+
+  public set(key: ResponseCacheKey, value: any): void {
+    const exactKey = this.exactKeyFor(key)
+    const id = sha256(exactKey + key.imageHashes.join(","))
+
+    this.entries.delete(id)
+    this.entries.set(id, {
+      exactKey,
+      imageHashes: key.imageHashes,
+      perceptualHashes: key.perceptualHashes,
+      value,
+      createdAt: Date.now()
+    })
+
+    while (this.entries.size > this.options.maxEntries) {
+      const oldest = this.entries.keys().next().value
+      this.entries.delete(oldest)
+    }
+
+    this.schedulePersist()
+  }
+
+  public clear(): void {
+    this.entries.clear()
+    this.stats = { hits: 0, nearHits: 0, misses: 0 }
+    this.schedulePersist()
+  }
+
+  public getStats(): ResponseCacheStats {
+    return { ...this.stats, entries: this.entries.size }
+  }
+
+  private exactKeyFor(key: ResponseCacheKey): string {
+    return sha256(
+      JSON.stringify([key.provider, key.model, key.template, key.inputs.map((input) => sha256(input)), key.imageHashes.length])
+    )
+  }
+
+  // 0 when every image is identical; otherwise the largest perceptual distance
+  // if near-duplicate matching is enabled, else Infinity
+  private imageDistance(entry: CacheEntry, key: ResponseCacheKey): number {
+    if (entry.imageHashes.length !== key.imageHashes.length) return Infinity
+    if (entry.imageHashes.every((hash, i) => hash === key.imageHashes[i])) return 0
+    if (this.options.maxHammingDistance <= 0 || !entry.perceptualHashes || !key.perceptualHashes) return Infinity
+
+    let max = 0
+    for (let i = 0; i < entry.imageHashes.length; i++) {
+      if (entry.imageHashes[i] === key.imageHashes[i]) continue
+      const a = entry.perceptualHashes[i]
+      const b = key.perceptualHashes[i]
+      if (!a || !b) return Infinity
+      max = Math.max(max, hammingDistance(a, b))
+    }
+    return max
+  }
+
+  private load(): void {
+    if (!this.options.persistDir) return
+    fs.promises.rm(path.join(this.options.persistDir, LEGACY_PERSIST_FILE), { force: true }).catch(() => {})
+    try {
+      const file = path.join(this.options.persistDir, PERSIST_FILE)
+      if (!fs.existsSync(file)) return
+
+      const now = Date.now()
+      const saved: Array<[string, CacheEntry]> = JSON.parse(fs.readFileSync(file, "utf8"))
+      for (const [id, entry] of saved) {
+        if (now - entry.createdAt <= this.options.ttlMs) this.entries.set(id, entry)
+      }
+      console.log(`[CacheHelper] Loaded ${this.entries.size} cached responses`)
+    } catch (error) {
+      console.error("[CacheHelper] Failed to load response cache:", error)
+    }
+  }
+
+  private schedulePersist(): void {
+    if (!this.options.persistDir || this.persistTimer) return
+    this.persistTimer = setTimeout(() => {
+      this.persistTimer = null
+      this.persist().catch((error) => console.error("[CacheHelper] Failed to save response cache:", error))
+    }, PERSIST_DELAY_MS)
+  }
+
+  private async persist(): Promise<void> {
+    const dir = this.options.persistDir
+    await fs.promises.mkdir(dir, { recursive: true })
+    const file = path.join(dir, PERSIST_FILE)
+    const tmpFile = `${file}.tmp`
+    await fs.promises.writeFile(tmpFile, JSON.stringify([...this.entries]))
+    await fs.promises.rename(tmpFile, file)
+  }
+}
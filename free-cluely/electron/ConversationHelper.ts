@@ -0,0 +1,76 @@
+// ConversationHelper.ts
+
+export interface ConversationTurn {
+  role: "user" | "model"
+  text: string
+}
+
+// Rough token estimate (about 4 characters per token) used for budgeting only
+export function estimateTokens(text: string): number {
+  return Math.ceil(text.length / 4)
+}
+
+const DIGEST_CHARS_PER_TURN = 200
+
+// Session-scoped rolling chat history. Keeps the most recent turns within a
+// token budget; turns pushed out of the window are folded into a short digest
+// so follow-up questions keep the gist without re-sending every old turn.
+export class ConversationHelper {
+  private turns: ConversationTurn[] = []
+  private summary: string = ""
+  private readonly maxTokens: number
+
+  constructor(maxTokens: number) {
+    this.maxTokens = maxTokens
+  }
+
+  public getTurns(): ConversationTurn[] {
+    return this.turns
+  }
+
+  public getSummary(): string {
+    return this.summary
+  }
+
+  // Records a completed exchange; call only after the model has answered so
+  // cancelled or failed requests leave the history untouched
+  public addExchange(userText: string, modelText: string): void {
+    this.turns.push({ role: "user", text: userText }, { role: "model", text: modelText })
+    this.trim()
+  }
+
+  public reset(): void {
+    this.turns = []
+    this.summary = ""
+  }
+
+  // Identifies the current conversation state, e.g. for response cache keys
+  public fingerprint(): string {
+    return JSON.stringify([this.summary, this.turns])
+  }
+
+  private trim(): void {
+    const summaryBudget = Math.floor(this.maxTokens / 4)
+    let total = this.turns.reduce((sum, turn) => sum + estimateTokens(turn.text), 0)
+
+    // Evict whole exchanges, oldest first, always keeping the latest one
+    while (total > this.maxTokens - summaryBudget && this.turns.length > 2) {
+      const evicted = this.turns.splice(0, 2)
+      for (const turn of evicted) {
+        total -= estimateTokens(turn.text)
+        const digest = turn.text.replace(/\s+/g, " ").slice(0, DIGEST_CHARS_PER_TURN)
+        this.summary += `${turn.role === "user" ? "User" : "Assistant"}: ${digest}\n`
+      }
+    }
+
+    // Oldest digest lines go first once the summary outgrows its share
+    while (estimateTokens(this.summary) > summaryBudget) {
+      const newline = this.summary.indexOf("\n")
+      if (newline < 0) {
+        this.summary = ""
+        break
+      }
+      this.summary = this.summary.slice(newline + 1)
+    }
+  }
+}
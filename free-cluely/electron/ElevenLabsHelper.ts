@@ -1,4 +1,4 @@
-import { ElevenLabsClient } from "@elevenlabs/elevenlabs-js"
+import type { ElevenLabsClient } from "@elevenlabs/elevenlabs-js"
 
 interface ScribeTokenResponse {
   token: string
@@ -10,23 +10,30 @@ export class ElevenLabsHelper {
 
   constructor() {
     this.apiKey = process.env.ELEVENLABS_API_KEY
-    if (this.apiKey) {
-      this.client = new ElevenLabsClient({ apiKey: this.apiKey })
-    }
   }
 
   public isConfigured(): boolean {
-    return !!this.apiKey && !!this.client
+    return !!this.apiKey
   }
 
-  public async getScribeToken(): Promise<ScribeTokenResponse> {
+  // The SDK is loaded and the client created on the first token request
+  private async getClient(): Promise<ElevenLabsClient> {
     if (!this.client) {
+      const { ElevenLabsClient } = await import("@elevenlabs/elevenlabs-js")
+      this.client = new ElevenLabsClient({ apiKey: this.apiKey })
+    }
+    return this.client
+  }
+
+  public async getScribeToken(): Promise<ScribeTokenResponse> {
+    if (!this.apiKey) {
       throw new Error("ElevenLabs API key not configured. Set ELEVENLABS_API_KEY environment variable.")
     }
 
     // Single-use tokens cannot be cached - always request a fresh one
     try {
-      const result = await this.client.tokens.singleUse.create("realtime_scribe")
+      const client = await this.getClient()
+      const result = await client.tokens.singleUse.create("realtime_scribe")
       return { token: result.token }
     } catch (error: unknown) {
       const errorMessage = error instanceof Error ? error.message : "Unknown error"
@@ -0,0 +1,119 @@
+// GeminiHelper.ts
+
+import { readSse } from "./StreamHelper"
+
+const GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta"
+
+export type GeminiPart = { text: string } | { inlineData: { data: string; mimeType: string } }
+
+export interface GeminiContent {
+  role: "user" | "model"
+  parts: GeminiPart[]
+}
+
+export interface GeminiRequest {
+  contents: GeminiContent[]
+  systemInstruction?: { parts: GeminiPart[] }
+  // Name of an explicit context cache holding the leading part of the prompt
+  cachedContent?: string
+}
+
+interface GeminiResponse {
+  candidates?: Array<{ content?: { parts?: Array<{ text?: string }> }; finishReason?: string }>
+  promptFeedback?: { blockReason?: string }
+}
+
+function responseText(response: GeminiResponse): string {
+  if (response.promptFeedback?.blockReason) {
+    throw new Error(`Gemini blocked the prompt: ${response.promptFeedback.blockReason}`)
+  }
+  return (response.candidates?.[0]?.content?.parts ?? []).map((part) => part.text ?? "").join("")
+}
+
+// Minimal Gemini REST client. Every call takes an AbortSignal that cancels the
+// HTTP request itself, so a cancelled or superseded call stops using bandwidth
+// and its scheduler slot as soon as it is aborted.
+export class GeminiHelper {
+  private readonly apiKey: string
+  private readonly model: string
+
+  constructor(apiKey: string, model: string) {
+    this.apiKey = apiKey
+    this.model = model
+  }
+
+  public getModel(): string {
+    return this.model
+  }
+
+  public async generate(request: GeminiRequest, signal?: AbortSignal): Promise<string> {
+    const response = await this.post(`models/${this.model}:generateContent`, request, signal)
+    return responseText(await response.json())
+  }
+
+  // Yields text fragments as the model produces them
+  public async *stream(request: GeminiRequest, signal?: AbortSignal): AsyncGenerator<string> {
+    const response = await this.post(`models/${this.model}:streamGenerateContent?alt=sse`, request, signal)
+    for await (const chunk of readSse<GeminiResponse>(response.body)) {
+      const text = responseText(chunk)
+      if (text) yield text
+    }
+  }
+
+  // Stores a prompt prefix server-side; requests naming it are billed the
+  // cached rate for it and skip its prefill. Returns the cache name.
+  public async createCache(
+    prefix: { systemInstruction?: { parts: GeminiPart[] }; contents: GeminiContent[] },
+    ttlSeconds: number
+  ): Promise<string> {
+    const response = await this.post("cachedContents", {
+      model: `models/${this.model}`,
+      ...prefix,
+      ttl: `${ttlSeconds}s`
+    })
+    const { name } = await response.json()
+    return name
+  }
+
+  // Model metadata: checks the key and model without generating
+  public async getModelInfo(): Promise<{ name: string; inputTokenLimit?: number; outputTokenLimit?: number }> {
+    const response = await fetch(`${GEMINI_API_URL}/models/${this.model}`, {
+      headers: { "x-goog-api-key": this.apiKey }
+    })
+    await this.throwIfFailed(response)
+    return response.json()
+  }
+
+  public async deleteCache(name: string): Promise<void> {
+    const response = await fetch(`${GEMINI_API_URL}/${name}`, {
+      method: "DELETE",
+      headers: { "x-goog-api-key": this.apiKey }
+    })
+    await this.throwIfFailed(response)
+  }
+
+  private async post(path: string, body: any, signal?: AbortSignal): Promise<Response> {
+    const response = await fetch(`${GEMINI_API_URL}/${path}`, {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        "x-goog-api-key": this.apiKey
+      },
+      body: JSON.stringify(body),
+      signal
+    })
+    await this.throwIfFailed(response)
+    return response
+  }
+
+  private async throwIfFailed(response: Response): Promise<void> {
+    if (response.ok) return
+    let detail = ""
+    try {
+      detail = (await response.json())?.error?.message ?? ""
+    } catch {
+      // Not a JSON error body
+    }
+    throw new Error(`Gemini API error: ${response.status} ${response.statusText}${detail ? ` - ${detail}` : ""}`)
+  }
+}
@@ -1,47 +1,179 @@
-import { GoogleGenerativeAI, GenerativeModel } from "@google/generative-ai"
 import fs from "fs"
+import { readNdjson, PartialJsonParser } from "./StreamHelper"
+import { GeminiHelper, GeminiContent, GeminiPart, GeminiRequest } from "./GeminiHelper"
+import { ResponseCache, sha256 } from "./CacheHelper"
+import { ConversationHelper, estimateTokens } from "./ConversationHelper"
+import { getWorkerPool, toTransferable } from "./WorkerPoolHelper"
+import { getTracer } from "./TraceHelper"
+
+const GEMINI_MODEL = "gemini-2.0-flash"
+// How long Ollama keeps the model (and its KV cache) loaded between requests
+const OLLAMA_KEEP_ALIVE = process.env.OLLAMA_KEEP_ALIVE || "30m"
+// Token budget for the rolling chat history
+const CHAT_HISTORY_MAX_TOKENS = Number(process.env.CHAT_HISTORY_MAX_TOKENS) || 6000
+// Responses larger than this are parsed on the worker pool; smaller ones are
+// cheaper to parse inline than to copy to a worker and back
+const WORKER_PARSE_THRESHOLD = 32 * 1024
+// Screenshots analysed in this session that follow-up chat can see
+const MAX_SESSION_IMAGES = 3
+// Gemini explicit context caching: the model's minimum cacheable prefix, and
+// how long a cache lives without being replaced
+const GEMINI_CACHE_MIN_TOKENS = Number(process.env.GEMINI_CACHE_MIN_TOKENS) || 4096
+const GEMINI_CACHE_TTL_SECONDS = Number(process.env.GEMINI_CACHE_TTL_SECONDS) || 600
+// A screenshot at the model-input size is tiled into about six 258-token tiles
+const ESTIMATED_IMAGE_TOKENS = 1500
 
 interface OllamaResponse {
   response: string
   done: boolean
 }
 
+interface OllamaChatResponse {
+  message?: { role: string; content: string }
+  done: boolean
+}
+
+// Last model discovery result, reused on the next launch
+interface ModelDiscovery {
+  url: string
+  requested: string
+  model: string
+  checkedAt: number
+}
+
+// Called with each text fragment as the model produces it
+export type StreamChunkHandler = (chunk: string) => void
+// Called with the best-effort parse of a JSON answer that is still streaming
+export type PartialJsonHandler = (partial: any) => void
+// Returns the preprocessed (downscaled, recompressed) encoding of an image
+export type ImageLoader = (imagePath: string) => Promise<{ data: string; mimeType: string; hash: string; perceptualHash?: string }>
+
+// Cache identity of an image: exact content hash, plus the perceptual hash
+// used only when near-duplicate matching is enabled
+interface ImageKey {
+  hash: string
+  perceptualHash?: string
+}
+
 export class LLMHelper {
-  private model: GenerativeModel | null = null
+  private geminiApiKey: string | null = null
+  private gemini: GeminiHelper | null = null
   private readonly systemPrompt = `You are Wingman AI, a helpful, proactive assistant for any kind of problem or situation (not just coding). For any user input, analyze the situation, provide a clear problem statement, relevant context, and suggest several possible responses or actions the user could take next. Always explain your reasoning. Present your suggestions as a list of options or next steps.`
   private useOllama: boolean = false
   private ollamaModel: string = "llama3.2"
   private ollamaUrl: string = "http://localhost:11434"
+  private requestedOllamaModel: string = ""
+  // Pending first discovery; Ollama requests wait for it when nothing was cached
+  private discovery: Promise<void> | null = null
+  private discoveryCacheFile: string | null = null
+  private imageLoader: ImageLoader | null = null
+  private responseCache: ResponseCache | null = null
+  private conversation = new ConversationHelper(CHAT_HISTORY_MAX_TOKENS)
+  private sessionImages: Array<ImageKey & { part: GeminiPart }> = []
+  // Explicit cache of the Gemini session prefix (system prompt + screenshots);
+  // name resolves to null when the prefix is too small to cache or creation failed
+  private geminiCache: { key: string; name: Promise<string | null>; expiresAt: number } | null = null
 
+  // Nothing is contacted here: Gemini is called over REST on first use and
+  // Ollama models are resolved by discoverModels()
   constructor(apiKey?: string, useOllama: boolean = false, ollamaModel?: string, ollamaUrl?: string) {
     this.useOllama = useOllama
-    
+    if (apiKey) this.geminiApiKey = apiKey
+
     if (useOllama) {
       this.ollamaUrl = ollamaUrl || "http://localhost:11434"
+      this.requestedOllamaModel = ollamaModel || ""
       this.ollamaModel = ollamaModel || "gemma:latest" // Default fallback
       console.log(`[LLMHelper] Using Ollama with model: ${this.ollamaModel}`)
-      
-      // Auto-detect and use first available model if specified model doesn't exist
-      this.initializeOllamaModel()
     } else if (apiKey) {
-      const genAI = new GoogleGenerativeAI(apiKey)
-      this.model = genAI.getGenerativeModel({ model: "gemini-2.0-flash" })
       console.log("[LLMHelper] Using Google Gemini")
     } else {
       throw new Error("Either provide Gemini API key or enable Ollama mode")
     }
   }
 
-  private async fileToGenerativePart(imagePath: string) {
+  private getGemini(): GeminiHelper {
+    if (!this.gemini) {
+      if (!this.geminiApiKey) throw new Error("No Gemini API key configured")
+      this.gemini = new GeminiHelper(this.geminiApiKey, GEMINI_MODEL)
+    }
+    return this.gemini
+  }
+
+  public setImageLoader(loader: ImageLoader): void {
+    this.imageLoader = loader
+  }
+
+  public setResponseCache(cache: ResponseCache): void {
+    this.responseCache = cache
+  }
+
+  public getResponseCache(): ResponseCache | null {
+    return this.responseCache
+  }
+
+  // Returns the image part plus the hashes used to key cached responses
+  private async fileToGenerativePart(imagePath: string): Promise<ImageKey & { part: GeminiPart }> {
+    const tracer = getTracer()
+    if (this.imageLoader) {
+      // Mostly waits on the encoding started at capture time
+      const { data, mimeType, hash, perceptualHash } = await tracer.span("encode.image-load", () => this.imageLoader(imagePath))
+      return { part: { inlineData: { data, mimeType } }, hash, perceptualHash }
+    }
+
     const imageData = await fs.promises.readFile(imagePath)
+    const hash = sha256(imageData)
+    const buffer = toTransferable(imageData)
+    const data = await tracer.span("encode.base64", () =>
+      getWorkerPool().run<string>({ kind: "encode-buffer", buffer }, [buffer])
+    )
     return {
-      inlineData: {
-        data: imageData.toString("base64"),
-        mimeType: "image/png"
-      }
+      part: {
+        inlineData: {
+          data,
+          mimeType: "image/png"
+        }
+      },
+      hash
     }
   }
 
+  // Serves a response from the cache when provider, model, template, inputs and
+  // images match (images exactly, or as near duplicates if enabled); replay()
+  // lets streaming callers still receive the cached answer through their chunk handler.
+  private async withCache<T>(
+    template: string,
+    inputs: string[],
+    images: ImageKey[],
+    compute: () => Promise<T>,
+    replay?: (value: T) => void
+  ): Promise<T> {
+    if (!this.responseCache) return compute()
+
+    // The key names the model that answers, so a first discovery still
+    // picking the Ollama model has to settle first
+    await this.discovery
+    const key = {
+      provider: this.getCurrentProvider(),
+      model: this.getCurrentModel(),
+      template,
+      inputs,
+      imageHashes: images.map((image) => image.hash),
+      perceptualHashes: images.every((image) => image.perceptualHash)
+        ? images.map((image) => image.perceptualHash)
+        : undefined
+    }
+    const cached = this.responseCache.get(key)
+    if (cached !== undefined) {
+      replay?.(cached)
+      return cached
+    }
+
+    const value = await compute()
+    this.responseCache.set(key, value)
+    return value
+  }
+
   private cleanJsonResponse(text: string): string {
     // Remove markdown code block syntax if present
     text = text.replace(/^```(?:json)?\n/, '').replace(/\n```$/, '');
@@ -50,7 +182,79 @@ export class LLMHelper {
     return text;
   }
 
-  private async callOllama(prompt: string): Promise<string> {
+  // The signal aborts the HTTP request itself for both providers. In Ollama
+  // mode the same request is sent to /api/generate.
+  private async generateText(request: any, onChunk?: StreamChunkHandler, signal?: AbortSignal): Promise<string> {
+    if (this.useOllama) {
+      const { prompt, images } = this.toOllamaRequest(request)
+      return this.callOllama(prompt, onChunk, signal, images)
+    }
+
+    return this.runGemini({ contents: [{ role: "user", parts: this.toGeminiParts(request) }] }, onChunk, signal)
+  }
+
+  private async runGemini(body: GeminiRequest, onChunk?: StreamChunkHandler, signal?: AbortSignal): Promise<string> {
+    const gemini = this.getGemini()
+    const timing = getTracer().startRequest({ provider: "gemini", cached: !!body.cachedContent })
+    if (!onChunk) {
+      const text = await gemini.generate(body, signal)
+      timing.end({ chars: text.length })
+      return text
+    }
+
+    let text = ""
+    for await (const chunkText of gemini.stream(body, signal)) {
+      timing.token()
+      text += chunkText
+      onChunk(chunkText)
+    }
+    timing.end({ chars: text.length })
+    return text
+  }
+
+  // Prompt strings and inlineData parts, as the callers build them
+  private toGeminiParts(request: any): GeminiPart[] {
+    const parts: any[] = Array.isArray(request) ? request : [request]
+    return parts.map((part) => (typeof part === "string" ? { text: part } : part))
+  }
+
+  // Ollama takes prompt text and base64 images as separate fields; its images
+  // field accepts nothing else, so other media (audio) is refused up front
+  private toOllamaRequest(request: any): { prompt: string; images: string[] } {
+    const parts: any[] = Array.isArray(request) ? request : [request]
+    const media = parts.filter((part) => part?.inlineData)
+    const unsupported = media.find((part) => !part.inlineData.mimeType?.startsWith("image/"))
+    if (unsupported) {
+      throw new Error(`Ollama cannot process ${unsupported.inlineData.mimeType} input; switch to Gemini to analyze audio`)
+    }
+    return {
+      prompt: parts.filter((part) => typeof part === "string").join("\n\n"),
+      images: media.map((part) => part.inlineData.data)
+    }
+  }
+
+  private async generateJson(request: any, onPartial?: PartialJsonHandler, signal?: AbortSignal): Promise<any> {
+    let onChunk: StreamChunkHandler | undefined
+    if (onPartial) {
+      const parser = new PartialJsonParser()
+      onChunk = (chunk) => {
+        const partial = parser.push(chunk)
+        if (partial !== undefined) onPartial(partial)
+      }
+    }
+
+    const text = await this.generateText(request, onChunk, signal)
+    return getTracer().span("parse", async () => {
+      if (text.length > WORKER_PARSE_THRESHOLD) {
+        return getWorkerPool().run({ kind: "parse-json", text })
+      }
+      return JSON.parse(this.cleanJsonResponse(text))
+    }, { chars: text.length })
+  }
+
+  private async callOllama(prompt: string, onChunk?: StreamChunkHandler, signal?: AbortSignal, images?: string[]): Promise<string> {
+    await this.discovery
+    const timing = getTracer().startRequest({ provider: "ollama" })
     try {
       const response = await fetch(`${this.ollamaUrl}/api/generate`, {
         method: 'POST',
@@ -60,26 +264,189 @@ export class LLMHelper {
         body: JSON.stringify({
           model: this.ollamaModel,
           prompt: prompt,
-          stream: false,
+          ...(images?.length ? { images } : {}),
+          stream: !!onChunk,
+          keep_alive: OLLAMA_KEEP_ALIVE,
           options: {
             temperature: 0.7,
             top_p: 0.9,
           }
         }),
+        signal,
       })
 
       if (!response.ok) {
         throw new Error(`Ollama API error: ${response.status} ${response.statusText}`)
       }
 
-      const data: OllamaResponse = await response.json()
-      return data.response
+      if (!onChunk) {
+        const data: OllamaResponse = await response.json()
+        timing.end({ chars: data.response.length })
+        return data.response
+      }
+
+      let text = ""
+      for await (const data of readNdjson<OllamaResponse>(response.body)) {
+        if (data.response) {
+          timing.token()
+          text += data.response
+          onChunk(data.response)
+        }
+        if (data.done) break
+      }
+      timing.end({ chars: text.length })
+      return text
     } catch (error) {
+      if (signal?.aborted) throw error
       console.error("[LLMHelper] Error calling Ollama:", error)
       throw new Error(`Failed to connect to Ollama: ${error.message}. Make sure Ollama is running on ${this.ollamaUrl}`)
     }
   }
 
+  // System prompt plus the digest of turns evicted from the rolling history
+  private getSessionPreamble(): string {
+    const summary = this.conversation.getSummary()
+    return summary
+      ? `${this.systemPrompt}\n\nEarlier in this conversation:\n${summary}`
+      : this.systemPrompt
+  }
+
+  // The system prompt and the session's screenshots form the stable prefix.
+  // It is sent as a Gemini context cache when large enough to be cached,
+  // otherwise inline as systemInstruction plus image parts. The history digest
+  // changes as turns are evicted, so it travels with the turns, not the cache.
+  private async callGeminiChat(message: string, onChunk?: StreamChunkHandler, signal?: AbortSignal): Promise<string> {
+    const contents: GeminiContent[] = [
+      ...this.conversation.getTurns().map((turn) => ({ role: turn.role, parts: [{ text: turn.text }] as GeminiPart[] })),
+      { role: "user", parts: [{ text: message }] }
+    ]
+    const summary = this.conversation.getSummary()
+    const context: GeminiPart[] = summary ? [{ text: `Earlier in this conversation:\n${summary}` }] : []
+
+    const cachedContent = await this.getGeminiCachedContent()
+    if (!cachedContent) {
+      context.unshift(...this.sessionImages.map((image) => image.part))
+    }
+    // History always starts with a user turn; context leads it
+    contents[0] = { ...contents[0], parts: [...context, ...contents[0].parts] }
+
+    return this.runGemini(
+      cachedContent
+        ? { cachedContent, contents }
+        : { systemInstruction: { parts: [{ text: this.systemPrompt }] }, contents },
+      onChunk,
+      signal
+    )
+  }
+
+  // Returns the cache for the current prefix, creating it (and dropping the
+  // previous one) when the screenshots change or it is about to expire
+  private getGeminiCachedContent(): Promise<string | null> {
+    if (this.sessionImages.length === 0) return Promise.resolve(null)
+
+    const key = sha256(JSON.stringify([GEMINI_MODEL, this.systemPrompt, this.sessionImages.map((image) => image.hash)]))
+    if (this.geminiCache?.key === key && Date.now() < this.geminiCache.expiresAt) {
+      return this.geminiCache.name
+    }
+
+    this.dropGeminiCache()
+    const tokens = estimateTokens(this.systemPrompt) + this.sessionImages.length * ESTIMATED_IMAGE_TOKENS
+    const name = tokens < GEMINI_CACHE_MIN_TOKENS
+      ? Promise.resolve(null)
+      : this.getGemini()
+          .createCache({
+            systemInstruction: { parts: [{ text: this.systemPrompt }] },
+            contents: [{ role: "user", parts: this.sessionImages.map((image) => image.part) }]
+          }, GEMINI_CACHE_TTL_SECONDS)
+          .catch((error) => {
+            console.error("[LLMHelper] Failed to create Gemini context cache:", error)
+            return null
+          })
+    // Renewed a little early so a request never names an expired cache
+    this.geminiCache = { key, name, expiresAt: Date.now() + (GEMINI_CACHE_TTL_SECONDS - 30) * 1000 }
+    return name
+  }
+
+  // Deleted with the client that created it: caches belong to the API key
+  private dropGeminiCache(): void {
+    const previous = this.geminiCache
+    const gemini = this.gemini
+    this.geminiCache = null
+    if (!previous || !gemini) return
+    previous.name.then((name) => {
+      if (name) return gemini.deleteCache(name)
+    }).catch((error) => console.error("[LLMHelper] Failed to delete Gemini context cache:", error))
+  }
+
+  // /api/chat keeps the conversation prefix identical between turns, so a model
+  // kept loaded by keep_alive reuses its KV cache instead of re-encoding it
+  private async callOllamaChat(message: string, onChunk?: StreamChunkHandler, signal?: AbortSignal): Promise<string> {
+    const messages = [
+      { role: "system", content: this.getSessionPreamble() },
+      ...this.conversation.getTurns().map((turn) => ({
+        role: turn.role === "model" ? "assistant" : "user",
+        content: turn.text
+      })),
+      { role: "user", content: message }
+    ]
+
+    await this.discovery
+    const timing = getTracer().startRequest({ provider: "ollama" })
+    try {
+      const response = await fetch(`${this.ollamaUrl}/api/chat`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+          model: this.ollamaModel,
+          messages,
+          stream: !!onChunk,
+          keep_alive: OLLAMA_KEEP_ALIVE,
+          options: {
+            temperature: 0.7,
+            top_p: 0.9,
+          }
+        }),
+        signal,
+      })
+
+      if (!response.ok) {
+        throw new Error(`Ollama API error: ${response.status} ${response.statusText}`)
+      }
+
+      if (!onChunk) {
+        const data: OllamaChatResponse = await response.json()
+        const text = data.message?.content ?? ""
+        timing.end({ chars: text.length })
+        return text
+      }
+
+      let text = ""
+      for await (const data of readNdjson<OllamaChatResponse>(response.body)) {
+        const content = data.message?.content
+        if (content) {
+          timing.token()
+          text += content
+          onChunk(content)
+        }
+        if (data.done) break
+      }
+      timing.end({ chars: text.length })
+      return text
+    } catch (error) {
+      if (signal?.aborted) throw error
+      console.error("[LLMHelper] Error calling Ollama chat:", error)
+      throw new Error(`Failed to connect to Ollama: ${error.message}. Make sure Ollama is running on ${this.ollamaUrl}`)
+    }
+  }
+
+  public resetConversation(): void {
+    this.conversation.reset()
+    this.sessionImages = []
+    this.dropGeminiCache()
+  }
+
   private async checkOllamaAvailable(): Promise<boolean> {
     try {
       const response = await fetch(`${this.ollamaUrl}/api/tags`)
@@ -89,7 +456,27 @@ export class LLMHelper {
     }
   }
 
-  private async initializeOllamaModel(): Promise<void> {
+  // Resolves the Ollama model without generating anything. A result cached
+  // by the previous launch is applied at once and requests go ahead; the
+  // refresh (/api/tags, then a /api/show metadata probe) runs in the background.
+  public discoverModels(cacheFile?: string): Promise<void> {
+    if (!this.useOllama) return Promise.resolve()
+    if (cacheFile) this.discoveryCacheFile = cacheFile
+
+    const cached = this.readDiscoveryCache()
+    if (cached) {
+      this.ollamaModel = cached.model
+      console.log(`[LLMHelper] Using cached model discovery: ${this.ollamaModel}`)
+    }
+
+    const refresh = this.refreshOllamaModel().finally(() => {
+      if (this.discovery === refresh) this.discovery = null
+    })
+    if (!cached) this.discovery = refresh
+    return refresh
+  }
+
+  private async refreshOllamaModel(): Promise<void> {
     try {
       const availableModels = await this.getOllamaModels()
       if (availableModels.length === 0) {
@@ -103,27 +490,76 @@ export class LLMHelper {
         console.log(`[LLMHelper] Auto-selected first available model: ${this.ollamaModel}`)
       }
 
-      // Test the selected model works
-      const testResult = await this.callOllama("Hello")
+      await this.probeOllamaModel()
       console.log(`[LLMHelper] Successfully initialized with model: ${this.ollamaModel}`)
+      await this.writeDiscoveryCache()
     } catch (error) {
       console.error(`[LLMHelper] Failed to initialize Ollama model: ${error.message}`)
-      // Try to use first available model as fallback
-      try {
-        const models = await this.getOllamaModels()
-        if (models.length > 0) {
-          this.ollamaModel = models[0]
-          console.log(`[LLMHelper] Fallback to: ${this.ollamaModel}`)
-        }
-      } catch (fallbackError) {
-        console.error(`[LLMHelper] Fallback also failed: ${fallbackError.message}`)
-      }
     }
   }
 
-  public async extractProblemFromImages(imagePaths: string[]) {
+  // Metadata only: confirms the model exists without loading it or generating
+  private async probeOllamaModel(): Promise<void> {
+    const response = await fetch(`${this.ollamaUrl}/api/show`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ model: this.ollamaModel }),
+    })
+    if (!response.ok) {
+      throw new Error(`Model ${this.ollamaModel} not available: ${response.status} ${response.statusText}`)
+    }
+  }
+
+  private readDiscoveryCache(): ModelDiscovery | null {
+    if (!this.discoveryCacheFile) return null
     try {
-      const imageParts = await Promise.all(imagePaths.map(path => this.fileToGenerativePart(path)))
+      const cached: ModelDiscovery = JSON.parse(fs.readFileSync(this.discoveryCacheFile, "utf8"))
+      return cached.url === this.ollamaUrl && cached.requested === this.requestedOllamaModel ? cached : null
+    } catch {
+      return null
+    }
+  }
+
+  private async writeDiscoveryCache(): Promise<void> {
+    if (!this.discoveryCacheFile) return
+    const discovery: ModelDiscovery = {
+      url: this.ollamaUrl,
+      requested: this.requestedOllamaModel,
+      model: this.ollamaModel,
+      checkedAt: Date.now()
+    }
+    try {
+      await fs.promises.writeFile(this.discoveryCacheFile, JSON.stringify(discovery))
+    } catch (error) {
+      console.error("[LLMHelper] Failed to save model discovery:", error)
+    }
+  }
+
+  // Optional, separate from discovery: gets the first real request off a cold
+  // start. Ollama loads a model (kept for OLLAMA_KEEP_ALIVE) on an empty
+  // prompt; Gemini has nothing to load.
+  public async warmUp(): Promise<void> {
+    if (!this.useOllama) return
+
+    await this.discovery
+    const response = await fetch(`${this.ollamaUrl}/api/generate`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ model: this.ollamaModel, prompt: "", keep_alive: OLLAMA_KEEP_ALIVE }),
+    })
+    if (!response.ok) {
+      throw new Error(`Ollama warm-up failed: ${response.status} ${response.statusText}`)
+    }
+    console.log(`[LLMHelper] Warmed up ${this.ollamaModel}`)
+  }
+
+  public async extractProblemFromImages(imagePaths: string[], onPartial?: PartialJsonHandler, signal?: AbortSignal) {
+    try {
+      const images = await Promise.all(imagePaths.map(path => this.fileToGenerativePart(path)))
       
       const prompt = `${this.systemPrompt}\n\nYou are a wingman. Please analyze these images and extract the following information in JSON format:\n{
   "problem_statement": "A clear statement of the problem or situation depicted in the images.",
@@ -132,47 +568,39 @@ export class LLMHelper {
   "reasoning": "Explanation of why these suggestions are appropriate."
 }\nImportant: Return ONLY the JSON object, without any markdown formatting or code blocks.`
 
-      const result = await this.model.generateContent([prompt, ...imageParts])
-      const response = await result.response
-      const text = this.cleanJsonResponse(response.text())
-      return JSON.parse(text)
+      const problem = await this.withCache(
+        "extract-problem",
+        [prompt],
+        images,
+        () => this.generateJson([prompt, ...images.map(image => image.part)], onPartial, signal),
+        onPartial
+      )
+      // Follow-up chat can refer back to the screens the problem came from
+      images.forEach(image => this.addSessionImage(image))
+      return problem
     } catch (error) {
       console.error("Error extracting problem from images:", error)
       throw error
     }
   }
 
-  public async generateSolution(problemInfo: any) {
-    const prompt = `${this.systemPrompt}\n\nGiven this problem or situation:\n${JSON.stringify(problemInfo, null, 2)}\n\nPlease provide your response in the following JSON format:\n{
-  "solution": {
-    "code": "The code or main answer here.",
-    "problem_statement": "Restate the problem or situation.",
-    "context": "Relevant background/context.",
-    "suggested_responses": ["First possible answer or action", "Second possible answer or action", "..."],
-    "reasoning": "Explanation of why these suggestions are appropriate."
-  }
-}\nImportant: Return ONLY the JSON object, without any markdown formatting or code blocks.`
-
-    console.log("[LLMHelper] Calling Gemini LLM for solution...");
-    try {
-      const result = await this.model.generateContent(prompt)
-      console.log("[LLMHelper] Gemini LLM returned result.");
-      const response = await result.response
-      const text = this.cleanJsonResponse(response.text())
-      const parsed = JSON.parse(text)
-      console.log("[LLMHelper] Parsed LLM response:", parsed)
-      return parsed
-    } catch (error) {
-      console.error("[LLMHelper] Error in generateSolution:", error);
-      throw error;
+  // Stable leading part of debug prompts: system prompt, the extracted problem
+  // and the latest debug answer, if any. Built once per state version by
+  // the caller and reused verbatim, so it is a cacheable prefix for providers.
+  public buildContextPrefix(problemInfo: any, currentSolution?: any): string {
+    let prefix = `${this.systemPrompt}\n\nThe problem or situation:\n${JSON.stringify(problemInfo)}`
+    if (currentSolution) {
+      const current = typeof currentSolution === "string" ? currentSolution : JSON.stringify(currentSolution)
+      prefix += `\n\nThe current response or approach:\n${current}`
     }
+    return prefix
   }
 
-  public async debugSolutionWithImages(problemInfo: any, currentCode: string, debugImagePaths: string[]) {
+  public async debugSolutionWithImages(contextPrefix: string, debugImagePaths: string[], onPartial?: PartialJsonHandler, signal?: AbortSignal) {
     try {
-      const imageParts = await Promise.all(debugImagePaths.map(path => this.fileToGenerativePart(path)))
+      const imageParts = await Promise.all(debugImagePaths.map(async path => (await this.fileToGenerativePart(path)).part))
       
-      const prompt = `${this.systemPrompt}\n\nYou are a wingman. Given:\n1. The original problem or situation: ${JSON.stringify(problemInfo, null, 2)}\n2. The current response or approach: ${currentCode}\n3. The debug information in the provided images\n\nPlease analyze the debug information and provide feedback in this JSON format:\n{
+      const prompt = `${contextPrefix}\n\nYou are a wingman. The provided images contain debug information for the response above. Please analyze the debug information and provide feedback in this JSON format:\n{
   "solution": {
     "code": "The code or main answer here.",
     "problem_statement": "Restate the problem or situation.",
@@ -182,10 +610,7 @@ export class LLMHelper {
   }
 }\nImportant: Return ONLY the JSON object, without any markdown formatting or code blocks.`
 
-      const result = await this.model.generateContent([prompt, ...imageParts])
-      const response = await result.response
-      const text = this.cleanJsonResponse(response.text())
-      const parsed = JSON.parse(text)
+      const parsed = await this.generateJson([prompt, ...imageParts], onPartial, signal)
       console.log("[LLMHelper] Parsed debug LLM response:", parsed)
       return parsed
     } catch (error) {
@@ -194,19 +619,21 @@ export class LLMHelper {
     }
   }
 
-  public async analyzeAudioFile(audioPath: string) {
+  public async analyzeAudioFile(audioPath: string, signal?: AbortSignal) {
     try {
-      const audioData = await fs.promises.readFile(audioPath);
+      // Read and base64-encode on the worker pool, off the main process
       const audioPart = {
         inlineData: {
-          data: audioData.toString("base64"),
+          data: await getTracer().span("encode.base64", () =>
+            getWorkerPool().run<string>({ kind: "encode-file", path: audioPath })
+          ),
           mimeType: "audio/mp3"
         }
       };
       const prompt = `${this.systemPrompt}\n\nDescribe this audio clip in a short, concise answer. In addition to your main answer, suggest several possible actions or responses the user could take next based on the audio. Do not return a structured JSON object, just answer naturally as you would to a user.`;
-      const result = await this.model.generateContent([prompt, audioPart]);
-      const response = await result.response;
-      const text = response.text();
+      const text = await this.withCache("analyze-audio", [prompt, audioPart.inlineData.data], [], () =>
+        this.generateText([prompt, audioPart], undefined, signal)
+      );
       return { text, timestamp: Date.now() };
     } catch (error) {
       console.error("Error analyzing audio file:", error);
@@ -214,7 +641,7 @@ export class LLMHelper {
     }
   }
 
-  public async analyzeAudioFromBase64(data: string, mimeType: string) {
+  public async analyzeAudioFromBase64(data: string, mimeType: string, signal?: AbortSignal) {
     try {
       const audioPart = {
         inlineData: {
@@ -223,9 +650,9 @@ export class LLMHelper {
         }
       };
       const prompt = `${this.systemPrompt}\n\nDescribe this audio clip in a short, concise answer. In addition to your main answer, suggest several possible actions or responses the user could take next based on the audio. Do not return a structured JSON object, just answer naturally as you would to a user and be concise.`;
-      const result = await this.model.generateContent([prompt, audioPart]);
-      const response = await result.response;
-      const text = response.text();
+      const text = await this.withCache("analyze-audio", [prompt, mimeType, data], [], () =>
+        this.generateText([prompt, audioPart], undefined, signal)
+      );
       return { text, timestamp: Date.now() };
     } catch (error) {
       console.error("Error analyzing audio from base64:", error);
@@ -233,19 +660,23 @@ export class LLMHelper {
     }
   }
 
-  public async analyzeImageFile(imagePath: string) {
+  public async analyzeImageFile(imagePath: string, onChunk?: StreamChunkHandler, signal?: AbortSignal) {
     try {
-      const imageData = await fs.promises.readFile(imagePath);
-      const imagePart = {
-        inlineData: {
-          data: imageData.toString("base64"),
-          mimeType: "image/png"
-        }
-      };
+      const image = await this.fileToGenerativePart(imagePath);
       const prompt = `${this.systemPrompt}\n\nDescribe the content of this image in a short, concise answer. In addition to your main answer, suggest several possible actions or responses the user could take next based on the image. Do not return a structured JSON object, just answer naturally as you would to a user. Be concise and brief.`;
-      const result = await this.model.generateContent([prompt, imagePart]);
-      const response = await result.response;
-      const text = response.text();
+      const text = await this.withCache(
+        "analyze-image",
+        [prompt],
+        [image],
+        () => this.generateText([prompt, image.part], onChunk, signal),
+        onChunk
+      );
+      // Keep what was on screen in the chat context for follow-up questions,
+      // once per screenshot: capture and Cmd+Enter both analyse it
+      if (!this.sessionImages.some((existing) => existing.hash === image.hash)) {
+        this.conversation.addExchange("[Shared a screenshot for analysis]", text);
+      }
+      this.addSessionImage(image);
       return { text, timestamp: Date.now() };
     } catch (error) {
       console.error("Error analyzing image file:", error);
@@ -253,17 +684,30 @@ export class LLMHelper {
     }
   }
 
-  public async chatWithGemini(message: string): Promise<string> {
+  private addSessionImage(image: ImageKey & { part: GeminiPart }): void {
+    this.sessionImages = [...this.sessionImages.filter((existing) => existing.hash !== image.hash), image]
+      .slice(-MAX_SESSION_IMAGES);
+  }
+
+  public async chatWithGemini(message: string, onChunk?: StreamChunkHandler, signal?: AbortSignal): Promise<string> {
     try {
-      if (this.useOllama) {
-        return this.callOllama(message);
-      } else if (this.model) {
-        const result = await this.model.generateContent(message);
-        const response = await result.response;
-        return response.text();
-      } else {
+      if (!this.useOllama && !this.geminiApiKey) {
         throw new Error("No LLM provider configured");
       }
+
+      // The conversation state is part of the key: the same question can have
+      // a different answer later in the session
+      const text = await this.withCache(
+        "chat",
+        [this.conversation.fingerprint(), message],
+        this.useOllama ? [] : this.sessionImages,
+        () => this.useOllama
+          ? this.callOllamaChat(message, onChunk, signal)
+          : this.callGeminiChat(message, onChunk, signal),
+        onChunk
+      );
+      this.conversation.addExchange(message, text);
+      return text;
     } catch (error) {
       console.error("[LLMHelper] Error in chatWithGemini:", error);
       throw error;
@@ -298,7 +742,7 @@ export class LLMHelper {
   }
 
   public getCurrentModel(): string {
-    return this.useOllama ? this.ollamaModel : "gemini-2.0-flash";
+    return this.useOllama ? this.ollamaModel : GEMINI_MODEL;
   }
 
   public async switchToOllama(model?: string, url?: string): Promise<void> {
@@ -309,7 +753,7 @@ export class LLMHelper {
       this.ollamaModel = model;
     } else {
       // Auto-detect first available model
-      await this.initializeOllamaModel();
+      await this.refreshOllamaModel();
     }
     
     console.log(`[LLMHelper] Switched to Ollama: ${this.ollamaModel} at ${this.ollamaUrl}`);
@@ -317,11 +761,12 @@ export class LLMHelper {
 
   public async switchToGemini(apiKey?: string): Promise<void> {
     if (apiKey) {
-      const genAI = new GoogleGenerativeAI(apiKey);
-      this.model = genAI.getGenerativeModel({ model: "gemini-2.0-flash" });
+      this.dropGeminiCache();
+      this.geminiApiKey = apiKey;
+      this.gemini = null;
     }
     
-    if (!this.model && !apiKey) {
+    if (!this.geminiApiKey) {
       throw new Error("No Gemini API key provided and no existing model instance");
     }
     
@@ -336,22 +781,16 @@ export class LLMHelper {
         if (!available) {
           return { success: false, error: `Ollama not available at ${this.ollamaUrl}` };
         }
-        // Test with a simple prompt
-        await this.callOllama("Hello");
+        // Metadata probe instead of a generation
+        await this.probeOllamaModel();
         return { success: true };
       } else {
-        if (!this.model) {
+        if (!this.geminiApiKey) {
           return { success: false, error: "No Gemini model configured" };
         }
-        // Test with a simple prompt
-        const result = await this.model.generateContent("Hello");
-        const response = await result.response;
-        const text = response.text(); // Ensure the response is valid
-        if (text) {
-          return { success: true };
-        } else {
-          return { success: false, error: "Empty response from Gemini" };
-        }
+        // Key in a header, never in the URL where proxies and logs would keep it
+        await this.getGemini().getModelInfo();
+        return { success: true };
       }
     } catch (error) {
       return { success: false, error: error.message };
@@ -1,30 +1,56 @@
 // ProcessingHelper.ts
 
+import { app } from "electron"
+import path from "node:path"
 import { AppState } from "./main"
-import { LLMHelper } from "./LLMHelper"
-import dotenv from "dotenv"
+import { LLMHelper, StreamChunkHandler } from "./LLMHelper"
+import { SchedulerHelper, REQUEST_PRIORITY, RequestPriority, isAbortError } from "./SchedulerHelper"
+import { ResponseCache } from "./CacheHelper"
+import { getTracer } from "./TraceHelper"
+import { startMockOllamaServer } from "./mockOllamaServer"
+import { GEMINI_MODEL_FORMAT, OLLAMA_MODEL_FORMAT } from "./ScreenshotHelper"
 
-dotenv.config()
-
-const isDev = process.env.NODE_ENV === "development"
 const isDevTest = process.env.IS_DEV_TEST === "true"
 const MOCK_API_WAIT_TIME = Number(process.env.MOCK_API_WAIT_TIME) || 500
+const MOCK_API_PORT = Number(process.env.MOCK_API_PORT) || 11435
+const MOCK_TOKENS_PER_SECOND = Number(process.env.MOCK_TOKENS_PER_SECOND) || 40
+
+// Supersede keys: a new request with the same key cancels the previous one
+const PROCESS_KEY = "process-screenshots"
+const DEBUG_KEY = "debug-screenshots"
+const SCREENSHOT_ANALYSIS_KEY = "screenshot-analysis"
 
 export class ProcessingHelper {
   private appState: AppState
   private llmHelper: LLMHelper
-  private currentProcessingAbortController: AbortController | null = null
-  private currentExtraProcessingAbortController: AbortController | null = null
+  private scheduler: SchedulerHelper
+  private contextPrefix: { version: string; prefix: string } | null = null
 
   constructor(appState: AppState) {
     this.appState = appState
-    
+
+    // Ollama shares one local GPU/CPU, so it defaults to one request at a time
+    this.scheduler = new SchedulerHelper({
+      gemini: Number(process.env.GEMINI_MAX_CONCURRENCY) || 2,
+      ollama: Number(process.env.OLLAMA_MAX_CONCURRENCY) || 1
+    })
+
     // Check if user wants to use Ollama
     const useOllama = process.env.USE_OLLAMA === "true"
     const ollamaModel = process.env.OLLAMA_MODEL // Don't set default here, let LLMHelper auto-detect
     const ollamaUrl = process.env.OLLAMA_URL || "http://localhost:11434"
-    
-    if (useOllama) {
+    let providerReady: Promise<unknown> = Promise.resolve()
+
+    if (isDevTest) {
+      // Offline runs: answers come from the local mock server after MOCK_API_WAIT_TIME
+      console.log(`[ProcessingHelper] IS_DEV_TEST: using mock Ollama server on port ${MOCK_API_PORT}`)
+      providerReady = startMockOllamaServer({
+        port: MOCK_API_PORT,
+        latencyMs: MOCK_API_WAIT_TIME,
+        tokensPerSecond: MOCK_TOKENS_PER_SECOND
+      })
+      this.llmHelper = new LLMHelper(undefined, true, "mock:latest", `http://127.0.0.1:${MOCK_API_PORT}`)
+    } else if (useOllama) {
       console.log("[ProcessingHelper] Initializing with Ollama")
       this.llmHelper = new LLMHelper(undefined, true, ollamaModel, ollamaUrl)
     } else {
@@ -35,9 +61,47 @@ export class ProcessingHelper {
       console.log("[ProcessingHelper] Initializing with Gemini")
       this.llmHelper = new LLMHelper(apiKey, false)
     }
+
+    // Send the downscaled encodings computed at capture instead of raw PNGs
+    this.llmHelper.setImageLoader((path) =>
+      this.appState.getScreenshotHelper().getModelImage(
+        path,
+        this.llmHelper.getCurrentProvider() === "ollama" ? OLLAMA_MODEL_FORMAT : GEMINI_MODEL_FORMAT
+      )
+    )
+
+    if (process.env.LLM_CACHE_ENABLED !== "false") {
+      this.llmHelper.setResponseCache(new ResponseCache({
+        maxEntries: Number(process.env.LLM_CACHE_MAX_ENTRIES) || 200,
+        ttlMs: Number(process.env.LLM_CACHE_TTL_MS) || 60 * 60 * 1000,
+        maxHammingDistance: Number(process.env.LLM_CACHE_HAMMING_DISTANCE) || 0,
+        persistDir: process.env.LLM_CACHE_PERSIST === "true"
+          ? path.join(app.getPath("userData"), "cache")
+          : undefined
+      }))
+    }
+
+    this.setUpModelInBackground(providerReady)
+  }
+
+  // Model discovery (cached between launches) and the optional warm-up never
+  // block construction or the first paint
+  private setUpModelInBackground(providerReady: Promise<unknown>): void {
+    const cacheFile = path.join(app.getPath("userData"), "model-discovery.json")
+    providerReady
+      .then(() => this.llmHelper.discoverModels(cacheFile))
+      .then(() => process.env.LLM_WARMUP === "true" ? this.llmHelper.warmUp() : undefined)
+      .catch((error) => console.error("[ProcessingHelper] Background model setup failed:", error))
   }
 
+  // Each run is one trace: queue wait, image load, request, parse and render
   public async processScreenshots(): Promise<void> {
+    const trace = this.appState.getView() === "queue" ? "process-screenshots" : "debug-screenshots"
+    const tracer = getTracer()
+    return tracer.run(trace, () => tracer.span("total", () => this.runScreenshotPipeline()))
+  }
+
+  private async runScreenshotPipeline(): Promise<void> {
     const mainWindow = this.appState.getMainWindow()
     if (!mainWindow) return
 
@@ -57,11 +121,17 @@ export class ProcessingHelper {
         mainWindow.webContents.send(this.appState.PROCESSING_EVENTS.INITIAL_START);
         this.appState.setView('solutions');
         try {
-          const audioResult = await this.llmHelper.analyzeAudioFile(lastPath);
+          const audioResult = await this.schedule(
+            (signal) => this.llmHelper.analyzeAudioFile(lastPath, signal),
+            REQUEST_PRIORITY.FOREGROUND,
+            PROCESS_KEY
+          );
+          getTracer().expectRender(this.appState.PROCESSING_EVENTS.PROBLEM_EXTRACTED);
           mainWindow.webContents.send(this.appState.PROCESSING_EVENTS.PROBLEM_EXTRACTED, audioResult);
           this.appState.setProblemInfo({ problem_statement: audioResult.text, input_format: {}, output_format: {}, constraints: [], test_cases: [] });
           return;
         } catch (err: any) {
+          if (isAbortError(err)) return;
           console.error('Audio processing error:', err);
           mainWindow.webContents.send(this.appState.PROCESSING_EVENTS.INITIAL_SOLUTION_ERROR, err.message);
           return;
@@ -71,25 +141,30 @@ export class ProcessingHelper {
       // NEW: Handle screenshot as plain text (like audio)
       mainWindow.webContents.send(this.appState.PROCESSING_EVENTS.INITIAL_START)
       this.appState.setView("solutions")
-      this.currentProcessingAbortController = new AbortController()
+      // Same request as the automatic analysis of the latest capture; that one
+      // is dropped so a capture costs one round trip, not two in parallel
+      this.scheduler.cancel(SCREENSHOT_ANALYSIS_KEY, "Superseded by a newer request")
       try {
-        const imageResult = await this.llmHelper.analyzeImageFile(lastPath);
-        const problemInfo = {
-          problem_statement: imageResult.text,
-          input_format: { description: "Generated from screenshot", parameters: [] as any[] },
-          output_format: { description: "Generated from screenshot", type: "string", subtype: "text" },
-          complexity: { time: "N/A", space: "N/A" },
-          test_cases: [] as any[],
-          validation_type: "manual",
-          difficulty: "custom"
-        };
+        let streamedText = ""
+        const imageResult = await this.schedule(
+          (signal) => this.llmHelper.analyzeImageFile(lastPath, (chunk) => {
+            streamedText += chunk
+            mainWindow.webContents.send(
+              this.appState.PROCESSING_EVENTS.PROBLEM_PARTIAL,
+              this.buildScreenshotProblemInfo(streamedText)
+            )
+          }, signal),
+          REQUEST_PRIORITY.FOREGROUND,
+          PROCESS_KEY
+        );
+        const problemInfo = this.buildScreenshotProblemInfo(imageResult.text);
+        getTracer().expectRender(this.appState.PROCESSING_EVENTS.PROBLEM_EXTRACTED)
         mainWindow.webContents.send(this.appState.PROCESSING_EVENTS.PROBLEM_EXTRACTED, problemInfo);
         this.appState.setProblemInfo(problemInfo);
       } catch (error: any) {
+        if (isAbortError(error)) return
         console.error("Image processing error:", error)
         mainWindow.webContents.send(this.appState.PROCESSING_EVENTS.INITIAL_SOLUTION_ERROR, error.message)
-      } finally {
-        this.currentProcessingAbortController = null
       }
       return;
     } else {
@@ -102,66 +177,137 @@ export class ProcessingHelper {
       }
 
       mainWindow.webContents.send(this.appState.PROCESSING_EVENTS.DEBUG_START)
-      this.currentExtraProcessingAbortController = new AbortController()
 
       try {
-        // Get problem info and current solution
+        // Get problem info and the answer the user is already looking at
         const problemInfo = this.appState.getProblemInfo()
         if (!problemInfo) {
           throw new Error("No problem info available")
         }
+        const contextPrefix = this.getContextPrefix()
 
-        // Get current solution from state
-        const currentSolution = await this.llmHelper.generateSolution(problemInfo)
-        const currentCode = currentSolution.solution.code
-
-        // Debug the solution using vision model
-        const debugResult = await this.llmHelper.debugSolutionWithImages(
-          problemInfo,
-          currentCode,
-          extraScreenshotQueue
+        // Debug the current answer using vision model; fields are sent as they stream in
+        const debugResult = await this.schedule(
+          (signal) => this.llmHelper.debugSolutionWithImages(
+            contextPrefix,
+            extraScreenshotQueue,
+            (partial) => mainWindow.webContents.send(this.appState.PROCESSING_EVENTS.DEBUG_PARTIAL, partial),
+            signal
+          ),
+          REQUEST_PRIORITY.FOREGROUND,
+          DEBUG_KEY
         )
 
+        this.appState.setDebugResult(debugResult)
         this.appState.setHasDebugged(true)
+        getTracer().expectRender(this.appState.PROCESSING_EVENTS.DEBUG_SUCCESS)
         mainWindow.webContents.send(
           this.appState.PROCESSING_EVENTS.DEBUG_SUCCESS,
           debugResult
         )
 
       } catch (error: any) {
+        if (isAbortError(error)) return
         console.error("Debug processing error:", error)
         mainWindow.webContents.send(
           this.appState.PROCESSING_EVENTS.DEBUG_ERROR,
           error.message
         )
-      } finally {
-        this.currentExtraProcessingAbortController = null
       }
     }
   }
 
-  public cancelOngoingRequests(): void {
-    if (this.currentProcessingAbortController) {
-      this.currentProcessingAbortController.abort()
-      this.currentProcessingAbortController = null
+  // Rebuilt only when the problem or the latest debug answer changes
+  private getContextPrefix(): string {
+    const version = `${this.appState.getProblemInfoVersion()}:${this.appState.getDebugResultVersion()}`
+    if (this.contextPrefix?.version !== version) {
+      const debugResult = this.appState.getDebugResult()
+      this.contextPrefix = {
+        version,
+        // Screenshot/audio answers are plain text held in the problem statement
+        prefix: this.llmHelper.buildContextPrefix(
+          this.appState.getProblemInfo(),
+          debugResult?.solution ?? debugResult
+        )
+      }
     }
+    return this.contextPrefix.prefix
+  }
 
-    if (this.currentExtraProcessingAbortController) {
-      this.currentExtraProcessingAbortController.abort()
-      this.currentExtraProcessingAbortController = null
+  private buildScreenshotProblemInfo(text: string) {
+    return {
+      problem_statement: text,
+      input_format: { description: "Generated from screenshot", parameters: [] as any[] },
+      output_format: { description: "Generated from screenshot", type: "string", subtype: "text" },
+      complexity: { time: "N/A", space: "N/A" },
+      test_cases: [] as any[],
+      validation_type: "manual",
+      difficulty: "custom"
     }
+  }
+
+  // Every LLM call goes through the scheduler so it can be prioritised,
+  // limited per provider and aborted end to end. The caller's trace is carried
+  // into the queued run, which records how long it waited for a slot.
+  private schedule<T>(
+    run: (signal: AbortSignal) => Promise<T>,
+    priority: RequestPriority,
+    supersedeKey?: string
+  ): Promise<T> {
+    const tracer = getTracer()
+    const queuedAt = Date.now()
+    return this.scheduler.schedule(tracer.bind((signal: AbortSignal) => {
+      tracer.since("queue.wait", queuedAt)
+      return run(signal)
+    }), {
+      provider: this.llmHelper.getCurrentProvider(),
+      priority,
+      supersedeKey
+    })
+  }
 
+  public cancelOngoingRequests(): void {
+    this.scheduler.cancelAll()
     this.appState.setHasDebugged(false)
   }
 
+  public async chat(message: string, onChunk?: StreamChunkHandler): Promise<string> {
+    return this.schedule(
+      (signal) => this.llmHelper.chatWithGemini(message, onChunk, signal),
+      REQUEST_PRIORITY.INTERACTIVE
+    )
+  }
+
+  // Automatic analysis of a new screenshot supersedes the previous one
+  public async analyzeScreenshot(path: string, onChunk?: StreamChunkHandler) {
+    return this.schedule(
+      (signal) => this.llmHelper.analyzeImageFile(path, onChunk, signal),
+      REQUEST_PRIORITY.BACKGROUND,
+      SCREENSHOT_ANALYSIS_KEY
+    )
+  }
+
+  public async processImageFile(path: string) {
+    return this.schedule(
+      (signal) => this.llmHelper.analyzeImageFile(path, undefined, signal),
+      REQUEST_PRIORITY.FOREGROUND
+    )
+  }
+
   public async processAudioBase64(data: string, mimeType: string) {
     // Directly use LLMHelper to analyze inline base64 audio
-    return this.llmHelper.analyzeAudioFromBase64(data, mimeType);
+    return this.schedule(
+      (signal) => this.llmHelper.analyzeAudioFromBase64(data, mimeType, signal),
+      REQUEST_PRIORITY.INTERACTIVE
+    );
   }
 
   // Add audio file processing method
   public async processAudioFile(filePath: string) {
-    return this.llmHelper.analyzeAudioFile(filePath);
+    return this.schedule(
+      (signal) => this.llmHelper.analyzeAudioFile(filePath, signal),
+      REQUEST_PRIORITY.INTERACTIVE
+    );
   }
 
   public getLLMHelper() {
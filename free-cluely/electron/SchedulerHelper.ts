@@ -0,0 +1,164 @@
+// SchedulerHelper.ts
+
+// Lower value runs first
+export const REQUEST_PRIORITY = {
+  INTERACTIVE: 0, // chat and voice the user is waiting on
+  FOREGROUND: 1, // explicit "solve"/"debug" presses
+  BACKGROUND: 2 // automatic analysis of freshly captured screenshots
+} as const
+
+export type RequestPriority = (typeof REQUEST_PRIORITY)[keyof typeof REQUEST_PRIORITY]
+
+export interface ScheduleOptions {
+  provider: string
+  priority: RequestPriority
+  // A new request with the same key cancels the pending or running one
+  supersedeKey?: string
+}
+
+interface ScheduledJob {
+  id: number
+  options: ScheduleOptions
+  controller: AbortController
+  run: (signal: AbortSignal) => Promise<any>
+  resolve: (value: any) => void
+  reject: (reason: any) => void
+}
+
+export function createAbortError(message: string = "Request cancelled"): Error {
+  const error = new Error(message)
+  error.name = "AbortError"
+  return error
+}
+
+export function isAbortError(error: any): boolean {
+  return error?.name === "AbortError"
+}
+
+// Rejects as soon as the signal aborts, even if the work itself has not stopped yet
+export function abortable<T>(promise: Promise<T>, signal?: AbortSignal): Promise<T> {
+  if (!signal) return promise
+  if (signal.aborted) return Promise.reject(signal.reason ?? createAbortError())
+
+  return new Promise<T>((resolve, reject) => {
+    const onAbort = () => reject(signal.reason ?? createAbortError())
+    signal.addEventListener("abort", onAbort, { once: true })
+    promise.then(
+      (value) => {
+        signal.removeEventListener("abort", onAbort)
+        resolve(value)
+      },
+      (error) => {
+        signal.removeEventListener("abort", onAbort)
+        reject(error)
+      }
+    )
+  })
+}
+
+export class SchedulerHelper {
+  private pending: ScheduledJob[] = []
+  private running = new Map<number, ScheduledJob>()
+  private runningPerProvider = new Map<string, number>()
+  private concurrencyLimits: Record<string, number>
+  private nextId = 0
+
+  constructor(concurrencyLimits: Record<string, number>) {
+    this.concurrencyLimits = concurrencyLimits
+  }
+
+  public schedule<T>(
+    run: (signal: AbortSignal) => Promise<T>,
+    options: ScheduleOptions
+  ): Promise<T> {
+    if (options.supersedeKey) {
+      this.cancel(options.supersedeKey, "Superseded by a newer request")
+    }
+
+    return new Promise<T>((resolve, reject) => {
+      this.pending.push({
+        id: this.nextId++,
+        options,
+        controller: new AbortController(),
+        run,
+        resolve,
+        reject
+      })
+      // Stable: equal priorities keep submission order
+      this.pending.sort((a, b) => a.options.priority - b.options.priority || a.id - b.id)
+      this.drain()
+    })
+  }
+
+  // Cancels every pending or running job scheduled with this supersede key
+  public cancel(supersedeKey: string, reason: string = "Request cancelled"): void {
+    this.cancelWhere((job) => job.options.supersedeKey === supersedeKey, reason)
+  }
+
+  public cancelAll(reason: string = "Request cancelled"): void {
+    this.cancelWhere(() => true, reason)
+  }
+
+  public getStats() {
+    return {
+      pending: this.pending.length,
+      running: this.running.size,
+      runningPerProvider: Object.fromEntries(this.runningPerProvider)
+    }
+  }
+
+  private cancelWhere(predicate: (job: ScheduledJob) => boolean, reason: string): void {
+    const error = createAbortError(reason)
+
+    this.pending = this.pending.filter((job) => {
+      if (!predicate(job)) return true
+      job.controller.abort(error)
+      job.reject(error)
+      return false
+    })
+
+    // Running jobs reject via abortable() in start(); their slot is freed once
+    // the aborted request has actually stopped
+    this.running.forEach((job) => {
+      if (predicate(job)) job.controller.abort(error)
+    })
+  }
+
+  private limitFor(provider: string): number {
+    return this.concurrencyLimits[provider] ?? 1
+  }
+
+  private drain(): void {
+    for (let i = 0; i < this.pending.length; ) {
+      const job = this.pending[i]
+      const provider = job.options.provider
+      const active = this.runningPerProvider.get(provider) ?? 0
+
+      if (active >= this.limitFor(provider)) {
+        i++
+        continue
+      }
+
+      this.pending.splice(i, 1)
+      this.start(job)
+    }
+  }
+
+  private start(job: ScheduledJob): void {
+    const provider = job.options.provider
+    this.running.set(job.id, job)
+    this.runningPerProvider.set(provider, (this.runningPerProvider.get(provider) ?? 0) + 1)
+
+    // The caller hears about a cancellation at once, but the slot is held until
+    // the work settles so the per-provider limit holds for in-flight requests
+    const work = job.run(job.controller.signal)
+    abortable(work, job.controller.signal).then(job.resolve, job.reject)
+    work
+      .catch(() => {})
+      .finally(() => {
+        this.running.delete(job.id)
+        this.runningPerProvider.set(provider, this.runningPerProvider.get(provider) - 1)
+        this.drain()
+      })
+  }
+}
@@ -4,6 +4,34 @@ import path from "node:path"
 import fs from "node:fs"
 import { v4 as uuidv4 } from "uuid"
 import screenshot from "screenshot-desktop"
+import { getWorkerPool, toTransferable } from "./WorkerPoolHelper"
+import { getTracer } from "./TraceHelper"
+
+export type ModelImageFormat = "webp" | "jpeg"
+
+// Model input: longest edge and encoding sent to the LLM. Ollama's vision
+// runners decode with stb_image, which cannot read WebP, so Ollama always
+// gets JPEG; SCREENSHOT_FORMAT applies to Gemini.
+const MODEL_MAX_EDGE = Number(process.env.SCREENSHOT_MAX_EDGE) || 1600
+export const GEMINI_MODEL_FORMAT: ModelImageFormat = process.env.SCREENSHOT_FORMAT === "jpeg" ? "jpeg" : "webp"
+export const OLLAMA_MODEL_FORMAT: ModelImageFormat = "jpeg"
+const MODEL_QUALITY = Number(process.env.SCREENSHOT_QUALITY) || 80
+// Queue UI thumbnail
+const THUMBNAIL_MAX_EDGE = 320
+// Time given to the window manager to hide the overlay before capturing
+const HIDE_DELAY_MS = Number(process.env.SCREENSHOT_HIDE_DELAY_MS ?? 100)
+
+export interface ModelImage {
+  data: string // base64
+  mimeType: string
+  hash: string // SHA-256 of the captured image, hex
+  perceptualHash: string // 1024-bit difference hash, hex; for opt-in near-duplicate matching
+}
+
+interface ProcessedScreenshot {
+  modelImage: ModelImage
+  thumbnail: string // data URL
+}
 
 export class ScreenshotHelper {
   private screenshotQueue: string[] = []
@@ -13,7 +41,13 @@ export class ScreenshotHelper {
   private readonly screenshotDir: string
   private readonly extraScreenshotDir: string
 
+  // Encodings computed once per capture and shared by every consumer
+  private processed = new Map<string, Promise<ProcessedScreenshot>>()
+
   private view: "queue" | "solutions" = "queue"
+  // Encoding for new captures: follows the format the model last asked for
+  private modelFormat: ModelImageFormat =
+    process.env.USE_OLLAMA === "true" || process.env.IS_DEV_TEST === "true" ? OLLAMA_MODEL_FORMAT : GEMINI_MODEL_FORMAT
 
   constructor(view: "queue" | "solutions" = "queue") {
     this.view = view
@@ -48,6 +82,8 @@ export class ScreenshotHelper {
   }
 
   public clearQueues(): void {
+    this.processed.clear()
+
     // Clear screenshotQueue
     this.screenshotQueue.forEach((screenshotPath) => {
       fs.unlink(screenshotPath, (err) => {
@@ -76,20 +112,23 @@ export class ScreenshotHelper {
   ): Promise<string> {
     try {
       hideMainWindow()
-      
+
       // Add a small delay to ensure window is hidden
-      await new Promise(resolve => setTimeout(resolve, 100))
-      
+      await getTracer().span("capture.hide-delay", () =>
+        new Promise(resolve => setTimeout(resolve, HIDE_DELAY_MS))
+      )
+
       let screenshotPath = ""
 
       if (this.view === "queue") {
         screenshotPath = path.join(this.screenshotDir, `${uuidv4()}.png`)
-        await screenshot({ filename: screenshotPath })
+        await this.capture(screenshotPath)
 
         this.screenshotQueue.push(screenshotPath)
         if (this.screenshotQueue.length > this.MAX_SCREENSHOTS) {
           const removedPath = this.screenshotQueue.shift()
           if (removedPath) {
+            this.processed.delete(removedPath)
             try {
               await fs.promises.unlink(removedPath)
             } catch (error) {
@@ -99,12 +138,13 @@ export class ScreenshotHelper {
         }
       } else {
         screenshotPath = path.join(this.extraScreenshotDir, `${uuidv4()}.png`)
-        await screenshot({ filename: screenshotPath })
+        await this.capture(screenshotPath)
 
         this.extraScreenshotQueue.push(screenshotPath)
         if (this.extraScreenshotQueue.length > this.MAX_SCREENSHOTS) {
           const removedPath = this.extraScreenshotQueue.shift()
           if (removedPath) {
+            this.processed.delete(removedPath)
             try {
               await fs.promises.unlink(removedPath)
             } catch (error) {
@@ -124,21 +164,72 @@ export class ScreenshotHelper {
     }
   }
 
+  // Captures the screen, keeps the full PNG on disk and starts encoding the
+  // model input and thumbnail from the in-memory buffer without re-reading it.
+  // The buffer is handed to the worker pool, so it must not be used afterwards.
+  private async capture(screenshotPath: string): Promise<void> {
+    const tracer = getTracer()
+    const png = await tracer.span("capture.grab", () => screenshot({ format: "png" }))
+    await tracer.span("capture.write", () => fs.promises.writeFile(screenshotPath, png), { bytes: png.length })
+    this.track(screenshotPath, this.processImage(png))
+  }
+
+  // Encoding runs on the worker pool; a captured buffer is transferred, not copied
+  private processImage(input: Buffer | string, format: ModelImageFormat = this.modelFormat): Promise<ProcessedScreenshot> {
+    const source = typeof input === "string" ? input : toTransferable(input)
+    return getTracer().span("encode.image", () => getWorkerPool().run<ProcessedScreenshot>(
+      {
+        kind: "encode-image",
+        input: source,
+        maxEdge: MODEL_MAX_EDGE,
+        format,
+        quality: MODEL_QUALITY,
+        thumbnailEdge: THUMBNAIL_MAX_EDGE
+      },
+      typeof source === "string" ? [] : [source]
+    ))
+  }
+
+  private track(filepath: string, processing: Promise<ProcessedScreenshot>): Promise<ProcessedScreenshot> {
+    this.processed.set(filepath, processing)
+    // Drop failed entries so the next consumer retries from the file on disk
+    processing.catch(() => {
+      if (this.processed.get(filepath) === processing) this.processed.delete(filepath)
+    })
+    return processing
+  }
+
+  private getProcessed(filepath: string): Promise<ProcessedScreenshot> {
+    // Files not captured by this helper are processed on first use
+    return this.processed.get(filepath) ?? this.track(filepath, this.processImage(filepath))
+  }
+
   public async getImagePreview(filepath: string): Promise<string> {
     try {
-      const data = await fs.promises.readFile(filepath)
-      return `data:image/png;base64,${data.toString("base64")}`
+      const { thumbnail } = await this.getProcessed(filepath)
+      return thumbnail
     } catch (error) {
       console.error("Error reading image:", error)
       throw error
     }
   }
 
+  // Downscaled, recompressed encoding used as LLM input. After a provider
+  // switch, screenshots captured in the other format are re-encoded once from
+  // disk and later captures use the new format.
+  public async getModelImage(filepath: string, format: ModelImageFormat = this.modelFormat): Promise<ModelImage> {
+    this.modelFormat = format
+    const { modelImage } = await this.getProcessed(filepath)
+    if (modelImage.mimeType === `image/${format}`) return modelImage
+    return (await this.track(filepath, this.processImage(filepath, format))).modelImage
+  }
+
   public async deleteScreenshot(
     path: string
   ): Promise<{ success: boolean; error?: string }> {
     try {
       await fs.promises.unlink(path)
+      this.processed.delete(path)
       if (this.view === "queue") {
         this.screenshotQueue = this.screenshotQueue.filter(
           (filePath) => filePath !== path
@@ -0,0 +1,175 @@
+// StreamHelper.ts
+
+// Reads a newline-delimited JSON body (Ollama's streaming format) and yields
+// one parsed object per line as soon as the line is complete.
+export async function* readNdjson<T = any>(
+  body: ReadableStream<Uint8Array>
+): AsyncGenerator<T> {
+  const reader = body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ""
+
+  try {
+    while (true) {
+      const { value, done } = await reader.read()
+      if (done) break
+      buffer += decoder.decode(value, { stream: true })
+
+      let newlineIndex = buffer.indexOf("\n")
+      while (newlineIndex >= 0) {
+        const line = buffer.slice(0, newlineIndex).trim()
+        buffer = buffer.slice(newlineIndex + 1)
+        if (line) yield JSON.parse(line) as T
+        newlineIndex = buffer.indexOf("\n")
+      }
+    }
+
+    buffer += decoder.decode()
+    if (buffer.trim()) yield JSON.parse(buffer) as T
+  } finally {
+    reader.releaseLock()
+  }
+}
+
+// Payload of one server-sent event: its "data:" lines joined, or null if it has none
+function sseData(event: string): string | null {
+  const lines = event
+    .split(/\r?\n/)
+    .filter((line) => line.startsWith("data:"))
+    .map((line) => line.slice(5).replace(/^ /, ""))
+  return lines.length > 0 ? lines.join("\n") : null
+}
+
+// Reads a server-sent events body (Gemini's alt=sse streaming format) and
+// yields the parsed JSON payload of each event as soon as it is complete.
+export async function* readSse<T = any>(
+  body: ReadableStream<Uint8Array>
+): AsyncGenerator<T> {
+  const reader = body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ""
+
+  try {
+    while (true) {
+      const { value, done } = await reader.read()
+      if (done) break
+      buffer += decoder.decode(value, { stream: true })
+
+      let match = buffer.match(/\r?\n\r?\n/)
+      while (match && match.index !== undefined) {
+        const data = sseData(buffer.slice(0, match.index))
+        buffer = buffer.slice(match.index + match[0].length)
+        if (data) yield JSON.parse(data) as T
+        match = buffer.match(/\r?\n\r?\n/)
+      }
+    }
+
+    buffer += decoder.decode()
+    const data = sseData(buffer)
+    if (data) yield JSON.parse(data) as T
+  } finally {
+    reader.releaseLock()
+  }
+}
+
+interface Checkpoint {
+  index: number
+  stack: string[]
+}
+
+function closeFor(stack: string[]): string {
+  return stack
+    .slice()
+    .reverse()
+    .map((open) => (open === "{" ? "}" : "]"))
+    .join("")
+}
+
+function tryParse(text: string): { ok: boolean; value?: any } {
+  try {
+    return { ok: true, value: JSON.parse(text) }
+  } catch {
+    return { ok: false }
+  }
+}
+
+// Best-effort parse of an incomplete JSON document. Open strings, objects and
+// arrays are closed; a trailing key or value that cannot be completed is
+// dropped. Returns undefined if nothing usable has arrived yet.
+export function parsePartialJson(text: string): any | undefined {
+  const start = text.search(/[{[]/)
+  if (start < 0) return undefined
+
+  const body = text.slice(start)
+  const stack: string[] = []
+  const checkpoints: Checkpoint[] = []
+  let inString = false
+  let escaped = false
+  let end = body.length
+
+  for (let i = 0; i < body.length; i++) {
+    const char = body[i]
+
+    if (inString) {
+      if (escaped) escaped = false
+      else if (char === "\\") escaped = true
+      else if (char === '"') inString = false
+      continue
+    }
+
+    if (char === '"') {
+      inString = true
+    } else if (char === "{" || char === "[") {
+      stack.push(char)
+      checkpoints.push({ index: i + 1, stack: stack.slice() })
+    } else if (char === "}" || char === "]") {
+      stack.pop()
+      if (stack.length === 0) {
+        // The top-level value is complete; ignore anything after it (fences etc.)
+        end = i + 1
+        break
+      }
+    } else if (char === ",") {
+      checkpoints.push({ index: i, stack: stack.slice() })
+    }
+  }
+
+  let head = body.slice(0, end)
+  if (inString) {
+    if (escaped) head = head.slice(0, -1)
+    head += '"'
+  }
+
+  const full = tryParse(head + closeFor(stack))
+  if (full.ok) return full.value
+
+  for (let i = checkpoints.length - 1; i >= 0; i--) {
+    const { index, stack: checkpointStack } = checkpoints[i]
+    const candidate = tryParse(body.slice(0, index) + closeFor(checkpointStack))
+    if (candidate.ok) return candidate.value
+  }
+
+  return undefined
+}
+
+// Accumulates streamed text for a JSON-shaped prompt and reports the partial
+// object each time a chunk changes what can be parsed from it.
+export class PartialJsonParser {
+  private text = ""
+  private lastSnapshot = ""
+
+  public push(chunk: string): any | undefined {
+    this.text += chunk
+    const value = parsePartialJson(this.text)
+    if (value === undefined) return undefined
+
+    const snapshot = JSON.stringify(value)
+    if (snapshot === this.lastSnapshot) return undefined
+    this.lastSnapshot = snapshot
+    return value
+  }
+
+  public getText(): string {
+    return this.text
+  }
+}
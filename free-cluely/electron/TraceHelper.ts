@@ -0,0 +1,208 @@
+// TraceHelper.ts
+
+import fs from "node:fs"
+import path from "node:path"
+import { AsyncLocalStorage } from "node:async_hooks"
+
+export interface TraceSpan {
+  traceId: string
+  trace: string // pipeline, e.g. "take-screenshot" or "process-screenshots"
+  stage: string // e.g. "capture.grab", "request.first-token", "render"
+  start: number // epoch ms
+  durationMs: number
+  attrs?: Record<string, string | number | boolean>
+}
+
+export interface StageStats {
+  count: number
+  p50Ms: number
+  p95Ms: number
+  lastMs: number
+}
+
+interface TraceContext {
+  traceId: string
+  trace: string
+}
+
+interface PendingRender {
+  context: TraceContext | undefined
+  stage: string
+  sentAt: number
+}
+
+const SAMPLES_PER_STAGE = 500
+const RECENT_SPANS = 100
+const MAX_PENDING_RENDERS = 50
+
+// Nearest-rank percentile of an ascending list
+export function percentile(sorted: number[], p: number): number {
+  if (sorted.length === 0) return 0
+  return sorted[Math.min(sorted.length - 1, Math.ceil((p / 100) * sorted.length) - 1)]
+}
+
+// Timing spans across the capture -> encode -> request -> first token -> parse
+// -> render pipeline. The active trace follows async calls, so helpers record
+// spans without a trace id being passed through every signature.
+export class TraceHelper {
+  private context = new AsyncLocalStorage<TraceContext>()
+  private samples = new Map<string, number[]>()
+  private recent: TraceSpan[] = []
+  private pendingRenders = new Map<string, PendingRender>()
+  private output: fs.WriteStream | null = null
+  private nextId = 0
+
+  // Appends every span to a JSONL file; null stops writing
+  public setOutputFile(file: string | null): void {
+    this.output?.end()
+    this.output = null
+    if (!file) return
+    fs.mkdirSync(path.dirname(file), { recursive: true })
+    this.output = fs.createWriteStream(file, { flags: "a" })
+    this.output.on("error", (error) => {
+      console.error("[TraceHelper] Failed to write trace file:", error)
+      this.output = null
+    })
+  }
+
+  // Runs fn as a new trace; spans recorded inside (across awaits) belong to it
+  public run<T>(trace: string, fn: () => T): T {
+    const traceId = `${trace}-${Date.now()}-${this.nextId++}`
+    return this.context.run({ traceId, trace }, fn)
+  }
+
+  // Captures the current trace so work started later (e.g. from a queue)
+  // is still attributed to it
+  public bind<A extends any[], T>(fn: (...args: A) => T): (...args: A) => T {
+    const context = this.context.getStore()
+    if (!context) return fn
+    return (...args: A) => this.context.run(context, () => fn(...args))
+  }
+
+  // Starts a span and returns the function that ends it
+  public start(stage: string, attrs?: TraceSpan["attrs"]): (endAttrs?: TraceSpan["attrs"]) => number {
+    const context = this.context.getStore()
+    const start = Date.now()
+    return (endAttrs) => {
+      const end = Date.now()
+      this.record(context, stage, start, end, endAttrs ? { ...attrs, ...endAttrs } : attrs)
+      return end - start
+    }
+  }
+
+  public async span<T>(stage: string, fn: () => Promise<T>, attrs?: TraceSpan["attrs"]): Promise<T> {
+    const end = this.start(stage, attrs)
+    try {
+      const result = await fn()
+      end()
+      return result
+    } catch (error) {
+      end({ error: true })
+      throw error
+    }
+  }
+
+  // Times a model request: "request.first-token" (network + prefill) once the
+  // first token arrives, "request.decode" for the rest of the stream and
+  // "request.total" for the whole call
+  public startRequest(attrs?: TraceSpan["attrs"]): { token: () => void; end: (endAttrs?: TraceSpan["attrs"]) => void } {
+    const context = this.context.getStore()
+    const start = Date.now()
+    let firstTokenAt = 0
+    return {
+      token: () => {
+        if (firstTokenAt) return
+        firstTokenAt = Date.now()
+        this.record(context, "request.first-token", start, firstTokenAt, attrs)
+      },
+      end: (endAttrs) => {
+        const end = Date.now()
+        const merged = endAttrs ? { ...attrs, ...endAttrs } : attrs
+        if (firstTokenAt) this.record(context, "request.decode", firstTokenAt, end, merged)
+        this.record(context, "request.total", start, end, merged)
+      }
+    }
+  }
+
+  // Records a span that started at `start` and ends now
+  public since(stage: string, start: number, attrs?: TraceSpan["attrs"]): void {
+    this.record(this.context.getStore(), stage, start, Date.now(), attrs)
+  }
+
+  // Called when a result is sent to the renderer; the renderer reports back
+  // once it has painted it and the gap (IPC + React render) is recorded as `stage`
+  public expectRender(key: string, stage: string = "render"): void {
+    this.pendingRenders.set(key, { context: this.context.getStore(), stage, sentAt: Date.now() })
+    if (this.pendingRenders.size > MAX_PENDING_RENDERS) {
+      this.pendingRenders.delete(this.pendingRenders.keys().next().value)
+    }
+  }
+
+  public rendered(key: string, renderedAt: number): void {
+    const pending = this.pendingRenders.get(key)
+    if (!pending) return
+    this.pendingRenders.delete(key)
+    this.record(pending.context, pending.stage, pending.sentAt, Math.max(pending.sentAt, renderedAt))
+  }
+
+  // p50/p95 per stage, keyed "<trace>/<stage>"
+  public getStats(): Record<string, StageStats> {
+    const stats: Record<string, StageStats> = {}
+    for (const [key, values] of this.samples) {
+      const sorted = [...values].sort((a, b) => a - b)
+      stats[key] = {
+        count: values.length,
+        p50Ms: percentile(sorted, 50),
+        p95Ms: percentile(sorted, 95),
+        lastMs: values[values.length - 1]
+      }
+    }
+    return stats
+  }
+
+  public getRecentSpans(): TraceSpan[] {
+    return [...this.recent]
+  }
+
+  public reset(): void {
+    this.samples.clear()
+    this.recent = []
+    this.pendingRenders.clear()
+  }
+
+  private record(
+    context: TraceContext | undefined,
+    stage: string,
+    start: number,
+    end: number,
+    attrs?: TraceSpan["attrs"]
+  ): void {
+    const span: TraceSpan = {
+      traceId: context?.traceId ?? "untraced",
+      trace: context?.trace ?? "untraced",
+      stage,
+      start,
+      durationMs: end - start,
+      ...(attrs ? { attrs } : {})
+    }
+
+    const key = `${span.trace}/${stage}`
+    const values = this.samples.get(key) ?? []
+    values.push(span.durationMs)
+    if (values.length > SAMPLES_PER_STAGE) values.shift()
+    this.samples.set(key, values)
+
+    this.recent.push(span)
+    if (this.recent.length > RECENT_SPANS) this.recent.shift()
+
+    this.output?.write(JSON.stringify(span) + "\n")
+  }
+}
+
+// Shared tracer for the main process
+let tracer: TraceHelper | null = null
+
+export function getTracer(): TraceHelper {
+  if (!tracer) tracer = new TraceHelper()
+  return tracer
+}
@@ -2,6 +2,7 @@
 import { BrowserWindow, screen } from "electron"
 import { AppState } from "main"
 import path from "node:path"
+import { getTracer } from "./TraceHelper"
 
 const isDev = process.env.NODE_ENV === "development"
 
@@ -131,7 +132,11 @@ export class WindowHelper {
         this.mainWindow.show()
         this.mainWindow.focus()
         this.mainWindow.setAlwaysOnTop(true)
-        console.log("Window is now visible and centered")
+
+        // Time to visible overlay, measured from process start
+        const tracer = getTracer()
+        tracer.run("startup", () => tracer.since("overlay.visible", Math.round(performance.timeOrigin)))
+        console.log(`Window is now visible and centered (${Math.round(performance.now())} ms after launch)`)
       }
     })
 
@@ -259,6 +264,15 @@ export class WindowHelper {
       return
     }
 
+    // Hotkey-to-window time, recorded when the hidden overlay is actually shown
+    if (!this.mainWindow.isVisible()) {
+      const requestedAt = Date.now()
+      const tracer = getTracer()
+      this.mainWindow.once("show", () => {
+        tracer.run("show-overlay", () => tracer.since("overlay.visible", requestedAt))
+      })
+    }
+
     this.centerWindow()
     this.mainWindow.show()
     this.mainWindow.focus()
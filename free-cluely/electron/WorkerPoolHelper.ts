@@ -0,0 +1,239 @@
+// WorkerPoolHelper.ts
+
+import os from "node:os"
+import path from "node:path"
+import { Worker, TransferListItem } from "node:worker_threads"
+
+// Jobs understood by worker-script/node/index.js
+export type WorkerJob =
+  | {
+      kind: "encode-image"
+      input: string | ArrayBuffer // file path or PNG bytes (transferred)
+      maxEdge: number
+      format: "webp" | "jpeg"
+      quality: number
+      thumbnailEdge: number
+    }
+  | { kind: "encode-file"; path: string }
+  | { kind: "encode-buffer"; buffer: ArrayBuffer }
+  | { kind: "parse-json"; text: string }
+
+export interface WorkerPoolMetrics {
+  size: number
+  busy: number
+  queueDepth: number
+  completed: number
+  failed: number
+  avgLatencyMs: number
+  p95LatencyMs: number
+}
+
+interface QueuedJob {
+  id: number
+  job: WorkerJob
+  transfer: TransferListItem[]
+  enqueuedAt: number
+  resolve: (value: any) => void
+  reject: (reason: any) => void
+}
+
+interface PoolWorker {
+  worker: Worker
+  current: QueuedJob | null
+}
+
+const WORKER_SCRIPT = path.join(__dirname, "..", "worker-script", "node", "index.js")
+const TASKS_SCRIPT = path.join(__dirname, "..", "worker-script", "node", "tasks.js")
+const LATENCY_SAMPLES = 200
+// Exits without a worker answering in between before the pool gives up on
+// threads; respawn delay doubles from the base with each one
+const MAX_RESPAWNS = 5
+const RESPAWN_BASE_DELAY_MS = 250
+const RESPAWN_MAX_DELAY_MS = 8000
+
+// Copies the bytes into a standalone ArrayBuffer when the Buffer is a view
+// into a larger (pooled) one, so transferring it cannot detach other data
+export function toTransferable(buffer: Buffer): ArrayBuffer {
+  if (buffer.byteOffset === 0 && buffer.byteLength === buffer.buffer.byteLength) {
+    return buffer.buffer as ArrayBuffer
+  }
+  return buffer.buffer.slice(buffer.byteOffset, buffer.byteOffset + buffer.byteLength) as ArrayBuffer
+}
+
+// Fixed-size pool of worker threads for CPU-heavy media work (image encoding,
+// base64, large JSON parsing) so it never blocks the Electron main process.
+export class WorkerPool {
+  private workers: PoolWorker[] = []
+  private queue: QueuedJob[] = []
+  private nextId = 0
+  private completed = 0
+  private failed = 0
+  // Queue wait + run time of recent jobs, in ms
+  private latencies: number[] = []
+  private crashes = 0
+  private respawnTimers = new Set<NodeJS.Timeout>()
+  // Set once workers keep crashing: jobs then run on the main thread
+  private inline = false
+
+  constructor(size: number) {
+    for (let i = 0; i < size; i++) {
+      this.workers.push(this.spawn())
+    }
+  }
+
+  public run<T>(job: WorkerJob, transfer: TransferListItem[] = []): Promise<T> {
+    if (this.inline) return this.runInline<T>(job)
+    return new Promise<T>((resolve, reject) => {
+      this.queue.push({ id: this.nextId++, job, transfer, enqueuedAt: Date.now(), resolve, reject })
+      this.dispatch()
+    })
+  }
+
+  public getMetrics(): WorkerPoolMetrics {
+    const sorted = [...this.latencies].sort((a, b) => a - b)
+    const avg = sorted.length ? sorted.reduce((sum, value) => sum + value, 0) / sorted.length : 0
+    return {
+      size: this.workers.length,
+      busy: this.workers.filter((entry) => entry.current).length,
+      queueDepth: this.queue.length,
+      completed: this.completed,
+      failed: this.failed,
+      avgLatencyMs: Math.round(avg),
+      p95LatencyMs: sorted.length ? sorted[Math.min(sorted.length - 1, Math.floor(sorted.length * 0.95))] : 0
+    }
+  }
+
+  public async destroy(): Promise<void> {
+    const workers = this.workers
+    this.workers = []
+    this.respawnTimers.forEach((timer) => clearTimeout(timer))
+    this.respawnTimers.clear()
+    this.queue.forEach((queued) => queued.reject(new Error("Worker pool destroyed")))
+    this.queue = []
+    await Promise.all(workers.map((entry) => entry.worker.terminate()))
+  }
+
+  private spawn(): PoolWorker {
+    const entry: PoolWorker = { worker: new Worker(WORKER_SCRIPT), current: null }
+
+    entry.worker.on("message", (message: { type: string; id?: number; data?: any; error?: string }) => {
+      const current = entry.current
+      if (!current || (message.id !== undefined && message.id !== current.id)) {
+        if (message.type === "error") console.error("[WorkerPool] Worker error:", message.error)
+        return
+      }
+      // A worker that answers is healthy, whatever the job's outcome
+      this.crashes = 0
+      if (message.type === "result") this.settle(entry, null, message.data)
+      else this.settle(entry, new Error(message.error), undefined)
+    })
+
+    // A crashed worker fails its job and is replaced after a backoff; after
+    // MAX_RESPAWNS exits in a row the pool falls back to inline work
+    entry.worker.on("error", (error) => {
+      console.error("[WorkerPool] Worker crashed:", error)
+      if (entry.current) this.settle(entry, error, undefined)
+    })
+    entry.worker.on("exit", (code) => {
+      const index = this.workers.indexOf(entry)
+      if (index < 0) return
+      this.workers.splice(index, 1)
+      if (entry.current) this.settle(entry, new Error(`Worker exited with code ${code}`), undefined)
+
+      this.crashes++
+      if (this.crashes > MAX_RESPAWNS) {
+        this.fallBackToInline(code)
+        return
+      }
+      const delay = Math.min(RESPAWN_BASE_DELAY_MS * 2 ** (this.crashes - 1), RESPAWN_MAX_DELAY_MS)
+      const timer = setTimeout(() => {
+        this.respawnTimers.delete(timer)
+        this.workers.push(this.spawn())
+        this.dispatch()
+      }, delay)
+      this.respawnTimers.add(timer)
+    })
+
+    return entry
+  }
+
+  // Jobs queued for the workers fail (their callers retry or surface the
+  // error); jobs submitted from now on run on the main thread
+  private fallBackToInline(code: number): void {
+    console.error(`[WorkerPool] Workers exited ${this.crashes} times in a row (last code ${code}); running jobs inline`)
+    this.inline = true
+
+    const workers = this.workers
+    this.workers = []
+    this.respawnTimers.forEach((timer) => clearTimeout(timer))
+    this.respawnTimers.clear()
+
+    const error = new Error("Worker pool unavailable: workers kept crashing")
+    for (const entry of workers) {
+      if (entry.current) this.settle(entry, error, undefined)
+      entry.worker.terminate()
+    }
+    this.queue.forEach((queued) => {
+      this.failed++
+      queued.reject(error)
+    })
+    this.queue = []
+  }
+
+  private async runInline<T>(job: WorkerJob): Promise<T> {
+    const start = Date.now()
+    try {
+      const { processTask } = require(TASKS_SCRIPT)
+      const result: T = await processTask(job)
+      this.completed++
+      return result
+    } catch (error) {
+      this.failed++
+      throw error
+    } finally {
+      this.recordLatency(start)
+    }
+  }
+
+  private recordLatency(enqueuedAt: number): void {
+    this.latencies.push(Date.now() - enqueuedAt)
+    if (this.latencies.length > LATENCY_SAMPLES) this.latencies.shift()
+  }
+
+  private settle(entry: PoolWorker, error: Error | null, data: any): void {
+    const job = entry.current
+    entry.current = null
+    this.recordLatency(job.enqueuedAt)
+
+    if (error) {
+      this.failed++
+      job.reject(error)
+    } else {
+      this.completed++
+      job.resolve(data)
+    }
+    this.dispatch()
+  }
+
+  private dispatch(): void {
+    for (const entry of this.workers) {
+      if (this.queue.length === 0) return
+      if (entry.current) continue
+
+      const job = this.queue.shift()
+      entry.current = job
+      entry.worker.postMessage({ type: "process", id: job.id, data: job.job }, job.transfer)
+    }
+  }
+}
+
+// Shared pool, created on first use
+let workerPool: WorkerPool | null = null
+
+export function getWorkerPool(): WorkerPool {
+  if (!workerPool) {
+    const size = Number(process.env.WORKER_POOL_SIZE) || Math.max(1, Math.min(4, os.cpus().length - 1))
+    workerPool = new WorkerPool(size)
+  }
+  return workerPool
+}
@@ -0,0 +1,155 @@
+// benchmark.ts
+//
+// Headless latency benchmark: drives the capture-encode -> request -> first
+// token -> parse paths against the local mock Ollama server and prints p50/p95
+// per stage. No Electron, model or network needed.
+//
+//   npm run bench -- --iterations 20 --latency 300 --tokens-per-second 40 \
+//     --trace bench.jsonl --max-p95 analyze-image/request.first-token=400
+
+import fs from "node:fs"
+import os from "node:os"
+import path from "node:path"
+import sharp from "sharp"
+import { LLMHelper } from "./LLMHelper"
+import { getTracer } from "./TraceHelper"
+import { getWorkerPool, toTransferable } from "./WorkerPoolHelper"
+import { startMockOllamaServer } from "./mockOllamaServer"
+import { ModelImage } from "./ScreenshotHelper"
+
+interface BenchmarkOptions {
+  iterations: number
+  latencyMs: number
+  tokensPerSecond: number
+  responseTokens: number
+  traceFile: string | null
+  json: boolean
+  // "<trace>/<stage>" -> maximum allowed p95 in ms
+  budgets: Record<string, number>
+}
+
+function parseArgs(argv: string[]): BenchmarkOptions {
+  const options: BenchmarkOptions = {
+    iterations: 20,
+    latencyMs: 300,
+    tokensPerSecond: 40,
+    responseTokens: 60,
+    traceFile: null,
+    json: false,
+    budgets: {}
+  }
+
+  for (let i = 0; i < argv.length; i++) {
+    const value = argv[i + 1]
+    switch (argv[i]) {
+      case "--iterations": options.iterations = Number(value); i++; break
+      case "--latency": options.latencyMs = Number(value); i++; break
+      case "--tokens-per-second": options.tokensPerSecond = Number(value); i++; break
+      case "--response-tokens": options.responseTokens = Number(value); i++; break
+      case "--trace": options.traceFile = value; i++; break
+      case "--json": options.json = true; break
+      case "--max-p95": {
+        const [stage, ms] = value.split("=")
+        options.budgets[stage] = Number(ms)
+        i++
+        break
+      }
+      default:
+        throw new Error(`Unknown argument: ${argv[i]}`)
+    }
+  }
+  return options
+}
+
+// A screen-sized image with enough detail that encoding cost is realistic
+function createScreenshot(): Promise<Buffer> {
+  return sharp({
+    create: {
+      width: 1920,
+      height: 1080,
+      channels: 3,
+      background: { r: 240, g: 240, b: 240 },
+      noise: { type: "gaussian", mean: 128, sigma: 30 }
+    }
+  }).png().toBuffer()
+}
+
+async function runIteration(llm: LLMHelper, png: Buffer, screenshotPath: string): Promise<void> {
+  const tracer = getTracer()
+
+  // Capture side: write the PNG and encode the model input on the worker pool
+  const encoded = await tracer.run("take-screenshot", async () => {
+    await tracer.span("capture.write", () => fs.promises.writeFile(screenshotPath, png))
+    const buffer = toTransferable(Buffer.from(png))
+    return tracer.span("encode.image", () =>
+      getWorkerPool().run<{ modelImage: ModelImage }>(
+        { kind: "encode-image", input: buffer, maxEdge: 1600, format: "jpeg", quality: 80, thumbnailEdge: 320 },
+        [buffer]
+      )
+    )
+  })
+  llm.setImageLoader(async () => encoded.modelImage)
+
+  const ignore = () => {}
+  await tracer.run("analyze-image", () => llm.analyzeImageFile(screenshotPath, ignore))
+  await tracer.run("extract-problem", () => llm.extractProblemFromImages([screenshotPath], ignore))
+  await tracer.run("chat", () => llm.chatWithGemini("What should I say next?", ignore))
+  llm.resetConversation()
+}
+
+async function main(): Promise<void> {
+  const options = parseArgs(process.argv.slice(2))
+  const tracer = getTracer()
+
+  const server = await startMockOllamaServer({
+    port: 0,
+    latencyMs: options.latencyMs,
+    tokensPerSecond: options.tokensPerSecond,
+    responseTokens: options.responseTokens
+  })
+  const llm = new LLMHelper(undefined, true, "mock:latest", server.url)
+
+  const dir = await fs.promises.mkdtemp(path.join(os.tmpdir(), "cluely-bench-"))
+  const screenshotPath = path.join(dir, "screenshot.png")
+  const png = await createScreenshot()
+
+  try {
+    // Warm-up (model probe, worker start, sharp load) is not measured
+    await llm.discoverModels()
+    await runIteration(llm, png, screenshotPath)
+    tracer.reset()
+    tracer.setOutputFile(options.traceFile)
+
+    for (let i = 0; i < options.iterations; i++) {
+      await runIteration(llm, png, screenshotPath)
+    }
+  } finally {
+    tracer.setOutputFile(null)
+    await server.close()
+    await getWorkerPool().destroy()
+    await fs.promises.rm(dir, { recursive: true, force: true })
+  }
+
+  const stats = tracer.getStats()
+  const failures = Object.entries(options.budgets)
+    .filter(([stage, maxMs]) => !stats[stage] || stats[stage].p95Ms > maxMs)
+    .map(([stage, maxMs]) => `${stage}: p95 ${stats[stage]?.p95Ms ?? "missing"} ms > ${maxMs} ms`)
+
+  if (options.json) {
+    console.log(JSON.stringify({ options, stats, failures }, null, 2))
+  } else {
+    console.log(`\n${options.iterations} iterations, ${options.latencyMs} ms to first token, ${options.tokensPerSecond} tokens/s\n`)
+    console.log(`${"stage".padEnd(40)}${"n".padStart(6)}${"p50".padStart(10)}${"p95".padStart(10)}`)
+    for (const [stage, value] of Object.entries(stats).sort(([a], [b]) => a.localeCompare(b))) {
+      console.log(`${stage.padEnd(40)}${String(value.count).padStart(6)}${`${value.p50Ms} ms`.padStart(10)}${`${value.p95Ms} ms`.padStart(10)}`)
+    }
+    failures.forEach((failure) => console.error(`Budget exceeded - ${failure}`))
+  }
+
+  process.exitCode = failures.length > 0 ? 1 : 0
+}
+
+main().catch((error) => {
+  console.error("[benchmark] Failed:", error)
+  process.exit(1)
+})
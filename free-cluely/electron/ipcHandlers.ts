@@ -1,8 +1,12 @@
 // ipcHandlers.ts
 
-import { ipcMain, app } from "electron"
+import { ipcMain, app, IpcMainInvokeEvent } from "electron"
 import { AppState } from "./main"
 import { ElevenLabsHelper } from "./ElevenLabsHelper"
+import { isAbortError } from "./SchedulerHelper"
+import { getWorkerPool } from "./WorkerPoolHelper"
+import { AudioStreamHelper } from "./AudioStreamHelper"
+import { getTracer } from "./TraceHelper"
 
 // Singleton instance for ElevenLabs
 let elevenLabsHelper: ElevenLabsHelper | null = null
@@ -14,7 +18,36 @@ function getElevenLabsHelper(): ElevenLabsHelper {
   return elevenLabsHelper
 }
 
+// Each call of a traced channel is one trace named after the channel; the
+// handler's own duration is recorded as "ipc.handler"
+function handleTraced(
+  channel: string,
+  handler: (event: IpcMainInvokeEvent, ...args: any[]) => Promise<any>
+): void {
+  ipcMain.handle(channel, (event, ...args) => {
+    const tracer = getTracer()
+    return tracer.run(channel, () => tracer.span("ipc.handler", () => handler(event, ...args)))
+  })
+}
+
 export function initializeIpcHandlers(appState: AppState): void {
+  const audioStreams = new AudioStreamHelper(appState)
+  // Session id -> removes the listeners tying the session to its renderer
+  const audioStreamOwners = new Map<string, () => void>()
+
+  // Pushes chunks tagged with the caller's streamId; the first one is timed
+  // until the renderer reports it painted
+  const streamSender = (event: IpcMainInvokeEvent, streamId: string) => {
+    let first = true
+    return (chunk: string) => {
+      if (first) {
+        first = false
+        getTracer().expectRender(streamId, "render.first-chunk")
+      }
+      event.sender.send(appState.PROCESSING_EVENTS.STREAM_CHUNK, { streamId, chunk })
+    }
+  }
+
   ipcMain.handle(
     "update-content-dimensions",
     async (event, { width, height }: { width: number; height: number }) => {
@@ -28,7 +61,7 @@ export function initializeIpcHandlers(appState: AppState): void {
     return appState.deleteScreenshot(path)
   })
 
-  ipcMain.handle("take-screenshot", async () => {
+  handleTraced("take-screenshot", async () => {
     try {
       const screenshotPath = await appState.takeScreenshot()
       const preview = await appState.getImagePreview(screenshotPath)
@@ -82,7 +115,7 @@ export function initializeIpcHandlers(appState: AppState): void {
   })
 
   // IPC handler for analyzing audio from base64 data
-  ipcMain.handle("analyze-audio-base64", async (event, data: string, mimeType: string) => {
+  handleTraced("analyze-audio-base64", async (event, data: string, mimeType: string) => {
     try {
       const result = await appState.processingHelper.processAudioBase64(data, mimeType)
       return result
@@ -92,8 +125,54 @@ export function initializeIpcHandlers(appState: AppState): void {
     }
   })
 
+  // Streamed recording: raw PCM chunks arrive as binary, silence is dropped in
+  // the main process and each spoken segment is analysed while recording continues
+  ipcMain.handle("audio-stream-start", async (event, { sampleRate }: { sampleRate: number }) => {
+    const sender = event.sender
+    let sessionId: string
+    try {
+      sessionId = audioStreams.start(sampleRate, (result) => {
+        if (!sender.isDestroyed()) {
+          sender.send(appState.PROCESSING_EVENTS.AUDIO_SEGMENT_RESULT, result)
+        }
+      })
+    } catch (error: any) {
+      console.error("Error in audio-stream-start handler:", error)
+      throw error
+    }
+
+    // A reloaded or closed renderer never sends audio-stream-stop
+    const discard = () => {
+      audioStreamOwners.delete(sessionId)
+      audioStreams.discard(sessionId)
+    }
+    sender.once("did-navigate", discard)
+    sender.once("destroyed", discard)
+    audioStreamOwners.set(sessionId, () => {
+      sender.off("did-navigate", discard)
+      sender.off("destroyed", discard)
+    })
+    return sessionId
+  })
+
+  // Fire-and-forget so chunks never wait on a round trip
+  ipcMain.on("audio-stream-chunk", (event, sessionId: string, chunk: ArrayBuffer) => {
+    audioStreams.push(sessionId, chunk)
+  })
+
+  ipcMain.handle("audio-stream-stop", async (event, sessionId: string) => {
+    try {
+      audioStreamOwners.get(sessionId)?.()
+      audioStreamOwners.delete(sessionId)
+      return await audioStreams.stop(sessionId)
+    } catch (error: any) {
+      console.error("Error in audio-stream-stop handler:", error)
+      throw error
+    }
+  })
+
   // IPC handler for analyzing audio from file path
-  ipcMain.handle("analyze-audio-file", async (event, path: string) => {
+  handleTraced("analyze-audio-file", async (event, path: string) => {
     try {
       const result = await appState.processingHelper.processAudioFile(path)
       return result
@@ -104,9 +183,9 @@ export function initializeIpcHandlers(appState: AppState): void {
   })
 
   // IPC handler for analyzing image from file path
-  ipcMain.handle("analyze-image-file", async (event, path: string) => {
+  handleTraced("analyze-image-file", async (event, path: string) => {
     try {
-      const result = await appState.processingHelper.getLLMHelper().analyzeImageFile(path)
+      const result = await appState.processingHelper.processImageFile(path)
       return result
     } catch (error: any) {
       console.error("Error in analyze-image-file handler:", error)
@@ -114,9 +193,9 @@ export function initializeIpcHandlers(appState: AppState): void {
     }
   })
 
-  ipcMain.handle("gemini-chat", async (event, message: string) => {
+  handleTraced("gemini-chat", async (event, message: string) => {
     try {
-      const result = await appState.processingHelper.getLLMHelper().chatWithGemini(message);
+      const result = await appState.processingHelper.chat(message);
       return result;
     } catch (error: any) {
       console.error("Error in gemini-chat handler:", error);
@@ -124,6 +203,32 @@ export function initializeIpcHandlers(appState: AppState): void {
     }
   });
 
+  // Streaming variants: chunks are pushed on STREAM_CHUNK tagged with the
+  // caller's streamId, and the invoke resolves with the full text when done.
+  handleTraced("gemini-chat-stream", async (event, streamId: string, message: string) => {
+    try {
+      return await appState.processingHelper.chat(message, streamSender(event, streamId));
+    } catch (error: any) {
+      // Cancelled by a reset: the renderer drops or marks the reply, no error
+      if (isAbortError(error)) return null;
+      console.error("Error in gemini-chat-stream handler:", error);
+      throw error;
+    }
+  });
+
+  handleTraced("analyze-image-file-stream", async (event, streamId: string, path: string) => {
+    try {
+      return await appState.processingHelper.analyzeScreenshot(path, streamSender(event, streamId))
+    } catch (error: any) {
+      // Superseded by a newer screenshot or cancelled by a reset
+      if (isAbortError(error)) {
+        return { text: "", timestamp: Date.now(), cancelled: true }
+      }
+      console.error("Error in analyze-image-file-stream handler:", error)
+      throw error
+    }
+  })
+
   ipcMain.handle("quit-app", () => {
     app.quit()
   })
@@ -208,6 +313,41 @@ export function initializeIpcHandlers(appState: AppState): void {
     }
   });
 
+  // LLM response cache
+  ipcMain.handle("get-llm-cache-stats", async () => {
+    const cache = appState.processingHelper.getLLMHelper().getResponseCache();
+    return cache ? cache.getStats() : null;
+  });
+
+  ipcMain.handle("clear-llm-cache", async () => {
+    try {
+      appState.processingHelper.getLLMHelper().getResponseCache()?.clear();
+      return { success: true };
+    } catch (error: any) {
+      console.error("Error clearing LLM cache:", error);
+      return { success: false, error: error.message };
+    }
+  });
+
+  ipcMain.handle("get-worker-pool-metrics", async () => {
+    return getWorkerPool().getMetrics();
+  });
+
+  // Latency tracing: p50/p95 per pipeline stage for the stats view
+  ipcMain.handle("get-trace-stats", async () => {
+    return getTracer().getStats();
+  });
+
+  ipcMain.handle("reset-trace-stats", async () => {
+    getTracer().reset();
+    return { success: true };
+  });
+
+  // Sent by the renderer once it has painted a result the main process sent
+  ipcMain.on("trace-rendered", (event, key: string, renderedAt: number) => {
+    getTracer().rendered(key, renderedAt);
+  });
+
   // ElevenLabs Scribe Token Handler
   ipcMain.handle("get-scribe-token", async () => {
     try {
@@ -1,12 +1,15 @@
+// The only place .env is loaded; it runs before any other module reads process.env
 import dotenv from "dotenv"
 dotenv.config()
 
 import { app, BrowserWindow, Tray, Menu, nativeImage } from "electron"
+import path from "node:path"
 import { initializeIpcHandlers } from "./ipcHandlers"
 import { WindowHelper } from "./WindowHelper"
 import { ScreenshotHelper } from "./ScreenshotHelper"
 import { ShortcutsHelper } from "./shortcuts"
 import { ProcessingHelper } from "./ProcessingHelper"
+import { getTracer } from "./TraceHelper"
 
 export class AppState {
   private static instance: AppState | null = null
@@ -14,7 +17,9 @@ export class AppState {
   private windowHelper: WindowHelper
   private screenshotHelper: ScreenshotHelper
   public shortcutsHelper: ShortcutsHelper
-  public processingHelper: ProcessingHelper
+  private processingHelperInstance: ProcessingHelper | null = null
+  // Set when construction failed (e.g. no API key); rethrown instead of retried
+  private processingHelperError: Error | null = null
   private tray: Tray | null = null
 
   // View management
@@ -28,6 +33,13 @@ export class AppState {
     test_cases: Array<Record<string, any>>
   } | null = null // Allow null
 
+  // Latest debug result for the current problem (the first answer is the
+  // problem statement itself). Versions bump on every change so derived data
+  // (e.g. the prompt context prefix) can be reused.
+  private debugResult: any | null = null
+  private problemInfoVersion: number = 0
+  private debugResultVersion: number = 0
+
   private hasDebugged: boolean = false
 
   // Processing events
@@ -39,13 +51,21 @@ export class AppState {
     //states for generating the initial solution
     INITIAL_START: "initial-start",
     PROBLEM_EXTRACTED: "problem-extracted",
+    PROBLEM_PARTIAL: "problem-partial",
     SOLUTION_SUCCESS: "solution-success",
     INITIAL_SOLUTION_ERROR: "solution-error",
 
     //states for processing the debugging
     DEBUG_START: "debug-start",
     DEBUG_SUCCESS: "debug-success",
-    DEBUG_ERROR: "debug-error"
+    DEBUG_PARTIAL: "debug-partial",
+    DEBUG_ERROR: "debug-error",
+
+    //token streaming for chat and image analysis
+    STREAM_CHUNK: "llm-stream-chunk",
+
+    //answers for voiced segments of a streamed recording
+    AUDIO_SEGMENT_RESULT: "audio-segment-result"
   } as const
 
   constructor() {
@@ -55,13 +75,47 @@ export class AppState {
     // Initialize ScreenshotHelper
     this.screenshotHelper = new ScreenshotHelper(this.view)
 
-    // Initialize ProcessingHelper
-    this.processingHelper = new ProcessingHelper(this)
+    // ProcessingHelper (LLM provider, caches, model discovery) is created on
+    // first use or once the overlay is visible, see initializeProcessingInBackground
 
     // Initialize ShortcutsHelper
     this.shortcutsHelper = new ShortcutsHelper(this)
   }
 
+  public getProcessingHelper(): ProcessingHelper {
+    if (this.processingHelperError) throw this.processingHelperError
+    if (!this.processingHelperInstance) {
+      try {
+        this.processingHelperInstance = new ProcessingHelper(this)
+      } catch (error: any) {
+        this.processingHelperError = new Error(`LLM processing is unavailable: ${error.message}`)
+        throw this.processingHelperError
+      }
+    }
+    return this.processingHelperInstance
+  }
+
+  // Nothing can be in flight if the helper was never built
+  public cancelOngoingRequests(): void {
+    this.processingHelperInstance?.cancelOngoingRequests()
+  }
+
+  public get processingHelper(): ProcessingHelper {
+    return this.getProcessingHelper()
+  }
+
+  // Called once the overlay is on screen so building the LLM stack never
+  // delays the first paint
+  public initializeProcessingInBackground(): void {
+    setImmediate(() => {
+      try {
+        this.getProcessingHelper()
+      } catch (error) {
+        console.error("Error initializing processing:", error)
+      }
+    })
+  }
+
   public static getInstance(): AppState {
     if (!AppState.instance) {
       AppState.instance = new AppState()
@@ -97,6 +151,27 @@ export class AppState {
 
   public setProblemInfo(problemInfo: any): void {
     this.problemInfo = problemInfo
+    this.problemInfoVersion++
+    // A new problem invalidates debug answers to the previous one
+    this.debugResult = null
+    this.debugResultVersion++
+  }
+
+  public getDebugResult(): any {
+    return this.debugResult
+  }
+
+  public setDebugResult(debugResult: any): void {
+    this.debugResult = debugResult
+    this.debugResultVersion++
+  }
+
+  public getProblemInfoVersion(): number {
+    return this.problemInfoVersion
+  }
+
+  public getDebugResultVersion(): number {
+    return this.debugResultVersion
   }
 
   public getScreenshotQueue(): string[] {
@@ -137,8 +212,14 @@ export class AppState {
   public clearQueues(): void {
     this.screenshotHelper.clearQueues()
 
-    // Clear problem info
+    // Start a fresh chat session for the next problem
+    this.processingHelperInstance?.getLLMHelper().resetConversation()
+
+    // Clear problem info and the answers derived from it
     this.problemInfo = null
+    this.debugResult = null
+    this.problemInfoVersion++
+    this.debugResultVersion++
 
     // Reset view to initial state
     this.setView("queue")
@@ -219,7 +300,7 @@ export class AppState {
       },
       {
         label: 'Take Screenshot (Cmd+H)',
-        click: async () => {
+        click: () => getTracer().run("take-screenshot", async () => {
           try {
             const screenshotPath = await this.takeScreenshot()
             const preview = await this.getImagePreview(screenshotPath)
@@ -233,7 +314,7 @@ export class AppState {
           } catch (error) {
             console.error("Error taking screenshot from tray:", error)
           }
-        }
+        })
       },
       {
         type: 'separator'
@@ -273,16 +354,25 @@ export class AppState {
 // Application initialization
 async function initializeApp() {
   const appState = AppState.getInstance()
+  const tracer = getTracer()
+
+  // Spans always feed the in-app stats; the JSONL file is opt-in (default on in dev)
+  tracer.setOutputFile(
+    process.env.TRACE_FILE ||
+      (process.env.NODE_ENV === "development" ? path.join(app.getPath("userData"), "traces.jsonl") : null)
+  )
 
   // Initialize IPC handlers before window creation
   initializeIpcHandlers(appState)
 
   app.whenReady().then(() => {
     console.log("App is ready")
+    tracer.run("startup", () => tracer.since("app.ready", Math.round(performance.timeOrigin)))
     appState.createWindow()
-    appState.createTray()
     // Register global shortcuts using ShortcutsHelper
     appState.shortcutsHelper.registerGlobalShortcuts()
+    appState.createTray()
+    appState.getMainWindow()?.once("show", () => appState.initializeProcessingInBackground())
   })
 
   app.on("activate", () => {
@@ -0,0 +1,140 @@
+// mockOllamaServer.ts
+
+import http from "node:http"
+import { AddressInfo } from "node:net"
+
+export interface MockOllamaOptions {
+  port?: number // 0 picks a free port
+  latencyMs: number // delay before the first token (network + prefill)
+  tokensPerSecond: number // decode rate once streaming
+  responseTokens?: number // length of plain-text answers
+  models?: string[]
+}
+
+export interface MockOllamaServer {
+  url: string
+  close: () => Promise<void>
+}
+
+const DEFAULT_MODELS = ["mock:latest"]
+
+const JSON_ANSWER = JSON.stringify({
+  problem_statement: "Mock problem statement extracted from the screenshot.",
+  context: "Generated by the local mock server for offline testing.",
+  suggested_responses: ["First mock suggestion", "Second mock suggestion", "Third mock suggestion"],
+  reasoning: "The mock server returns a fixed answer so timings are comparable between runs.",
+  solution: {
+    code: "console.log('mock')",
+    problem_statement: "Mock problem statement.",
+    context: "Mock context.",
+    suggested_responses: ["First mock suggestion", "Second mock suggestion"],
+    reasoning: "Fixed mock reasoning."
+  }
+})
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms))
+
+// Roughly 4 characters per token, like the real models
+function tokenize(text: string): string[] {
+  return text.match(/[\s\S]{1,4}/g) ?? []
+}
+
+// Prompts asking for JSON get a parseable object so the parse stage runs too
+function answerFor(prompt: string, responseTokens: number): string[] {
+  if (/JSON/.test(prompt)) return tokenize(JSON_ANSWER)
+  return Array.from({ length: responseTokens }, (_, i) => (i === 0 ? "Mock" : " tok"))
+}
+
+function readBody(req: http.IncomingMessage): Promise<any> {
+  return new Promise((resolve, reject) => {
+    let body = ""
+    req.setEncoding("utf8")
+    req.on("data", (chunk: string) => (body += chunk))
+    req.on("end", () => {
+      try {
+        resolve(body ? JSON.parse(body) : {})
+      } catch (error) {
+        reject(error)
+      }
+    })
+    req.on("error", reject)
+  })
+}
+
+// Minimal Ollama-compatible HTTP server (/api/tags, /api/show, /api/generate,
+// /api/chat) with configurable time to first token and token rate. Used by
+// the benchmark and by IS_DEV_TEST runs so no model or network is needed.
+export function startMockOllamaServer(options: MockOllamaOptions): Promise<MockOllamaServer> {
+  const models = options.models ?? DEFAULT_MODELS
+  const responseTokens = options.responseTokens ?? 60
+  const tokenDelayMs = 1000 / Math.max(1, options.tokensPerSecond)
+
+  const server = http.createServer(async (req, res) => {
+    try {
+      if (req.method === "GET" && req.url === "/api/tags") {
+        res.writeHead(200, { "Content-Type": "application/json" })
+        res.end(JSON.stringify({
+          models: models.map((name) => ({ name, model: name, size: 0, details: { family: "mock" } }))
+        }))
+        return
+      }
+
+      const body = await readBody(req)
+
+      if (req.method === "POST" && req.url === "/api/show") {
+        res.writeHead(200, { "Content-Type": "application/json" })
+        res.end(JSON.stringify({ details: { family: "mock", parameter_size: "0B" }, model_info: {} }))
+        return
+      }
+
+      const isChat = req.url === "/api/chat"
+      if (req.method !== "POST" || (!isChat && req.url !== "/api/generate")) {
+        res.writeHead(404)
+        res.end()
+        return
+      }
+
+      const prompt: string = isChat
+        ? (body.messages ?? []).map((message: any) => message.content).join("\n")
+        : body.prompt ?? ""
+      const tokens = answerFor(prompt, responseTokens)
+      const frame = (text: string, done: boolean) => isChat
+        ? { model: body.model, message: { role: "assistant", content: text }, done }
+        : { model: body.model, response: text, done }
+
+      let closed = false
+      res.on("close", () => (closed = true))
+
+      await sleep(options.latencyMs)
+
+      if (body.stream === false) {
+        await sleep(tokenDelayMs * tokens.length)
+        res.writeHead(200, { "Content-Type": "application/json" })
+        res.end(JSON.stringify(frame(tokens.join(""), true)))
+        return
+      }
+
+      res.writeHead(200, { "Content-Type": "application/x-ndjson" })
+      for (const token of tokens) {
+        if (closed) return
+        res.write(JSON.stringify(frame(token, false)) + "\n")
+        await sleep(tokenDelayMs)
+      }
+      res.end(JSON.stringify(frame("", true)) + "\n")
+    } catch (error: any) {
+      res.writeHead(500)
+      res.end(error.message)
+    }
+  })
+
+  return new Promise((resolve, reject) => {
+    server.once("error", reject)
+    server.listen(options.port ?? 0, "127.0.0.1", () => {
+      const { port } = server.address() as AddressInfo
+      resolve({
+        url: `http://127.0.0.1:${port}`,
+        close: () => new Promise<void>((done) => server.close(() => done()))
+      })
+    })
+  })
+}
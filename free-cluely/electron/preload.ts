@@ -18,10 +18,12 @@ interface ElectronAPI {
   onSolutionStart: (callback: () => void) => () => void
   onDebugStart: (callback: () => void) => () => void
   onDebugSuccess: (callback: (data: any) => void) => () => void
+  onDebugPartial: (callback: (data: any) => void) => () => void
   onSolutionError: (callback: (error: string) => void) => () => void
   onProcessingNoScreenshots: (callback: () => void) => () => void
   onProblemExtracted: (callback: (data: any) => void) => () => void
   onSolutionSuccess: (callback: (data: any) => void) => () => void
+  onProblemPartial: (callback: (data: any) => void) => () => void
 
   onUnauthorized: (callback: () => void) => () => void
   onDebugError: (callback: (error: string) => void) => () => void
@@ -33,6 +35,13 @@ interface ElectronAPI {
   analyzeAudioFromBase64: (data: string, mimeType: string) => Promise<{ text: string; timestamp: number }>
   analyzeAudioFile: (path: string) => Promise<{ text: string; timestamp: number }>
   analyzeImageFile: (path: string) => Promise<void>
+
+  // Streamed recording (16-bit mono PCM chunks)
+  startAudioStream: (options: { sampleRate: number }) => Promise<string>
+  sendAudioChunk: (sessionId: string, chunk: ArrayBuffer) => void
+  stopAudioStream: (sessionId: string) => Promise<Array<{ sessionId: string; index: number; text: string; timestamp: number; durationMs: number }>>
+  onAudioSegmentResult: (callback: (data: { sessionId: string; index: number; text: string; timestamp: number; durationMs: number }) => void) => () => void
+
   quitApp: () => Promise<void>
   
   // LLM Model Management
@@ -41,11 +50,23 @@ interface ElectronAPI {
   switchToOllama: (model?: string, url?: string) => Promise<{ success: boolean; error?: string }>
   switchToGemini: (apiKey?: string) => Promise<{ success: boolean; error?: string }>
   testLlmConnection: () => Promise<{ success: boolean; error?: string }>
+  getLlmCacheStats: () => Promise<{ hits: number; nearHits: number; misses: number; entries: number } | null>
+  clearLlmCache: () => Promise<{ success: boolean; error?: string }>
+  getWorkerPoolMetrics: () => Promise<{ size: number; busy: number; queueDepth: number; completed: number; failed: number; avgLatencyMs: number; p95LatencyMs: number }>
+
+  // Latency tracing
+  getTraceStats: () => Promise<Record<string, { count: number; p50Ms: number; p95Ms: number; lastMs: number }>>
+  resetTraceStats: () => Promise<{ success: boolean }>
+  traceRendered: (key: string) => void
 
   // ElevenLabs Scribe STT
   getScribeToken: () => Promise<{ success: boolean; token?: string; error?: string }>
   geminiChat: (message: string) => Promise<string>
 
+  // Token streaming
+  geminiChatStream: (message: string, onChunk: (chunk: string) => void) => Promise<string | null>
+  analyzeImageFileStream: (path: string, onChunk: (chunk: string) => void) => Promise<{ text: string; timestamp: number; cancelled?: boolean }>
+
   invoke: (channel: string, ...args: any[]) => Promise<any>
 }
 
@@ -57,15 +78,53 @@ export const PROCESSING_EVENTS = {
   //states for generating the initial solution
   INITIAL_START: "initial-start",
   PROBLEM_EXTRACTED: "problem-extracted",
+  PROBLEM_PARTIAL: "problem-partial",
   SOLUTION_SUCCESS: "solution-success",
   INITIAL_SOLUTION_ERROR: "solution-error",
 
   //states for processing the debugging
   DEBUG_START: "debug-start",
   DEBUG_SUCCESS: "debug-success",
-  DEBUG_ERROR: "debug-error"
+  DEBUG_PARTIAL: "debug-partial",
+  DEBUG_ERROR: "debug-error",
+
+  //token streaming for chat and image analysis
+  STREAM_CHUNK: "llm-stream-chunk",
+
+  //answers for voiced segments of a streamed recording
+  AUDIO_SEGMENT_RESULT: "audio-segment-result"
 } as const
 
+let streamCounter = 0
+
+// Reports, on the next frame, that a result sent by the main process has been
+// painted, closing its "render" span
+function traceRendered(key: string): void {
+  requestAnimationFrame(() => ipcRenderer.send("trace-rendered", key, Date.now()))
+}
+
+// Runs a streaming invoke, forwarding the chunks that belong to this call only
+function invokeWithStream<T>(
+  channel: string,
+  onChunk: (chunk: string) => void,
+  ...args: any[]
+): Promise<T> {
+  const streamId = `${channel}-${Date.now()}-${streamCounter++}`
+  let first = true
+  const subscription = (_: any, data: { streamId: string; chunk: string }) => {
+    if (data.streamId !== streamId) return
+    onChunk(data.chunk)
+    if (first) {
+      first = false
+      traceRendered(streamId)
+    }
+  }
+  ipcRenderer.on(PROCESSING_EVENTS.STREAM_CHUNK, subscription)
+  return ipcRenderer.invoke(channel, streamId, ...args).finally(() => {
+    ipcRenderer.removeListener(PROCESSING_EVENTS.STREAM_CHUNK, subscription)
+  })
+}
+
 // Expose the Electron API to the renderer process
 contextBridge.exposeInMainWorld("electronAPI", {
   updateContentDimensions: (dimensions: { width: number; height: number }) =>
@@ -123,6 +182,13 @@ contextBridge.exposeInMainWorld("electronAPI", {
       )
     }
   },
+  onDebugPartial: (callback: (data: any) => void) => {
+    const subscription = (_: any, data: any) => callback(data)
+    ipcRenderer.on(PROCESSING_EVENTS.DEBUG_PARTIAL, subscription)
+    return () => {
+      ipcRenderer.removeListener(PROCESSING_EVENTS.DEBUG_PARTIAL, subscription)
+    }
+  },
   onDebugError: (callback: (error: string) => void) => {
     const subscription = (_: any, error: string) => callback(error)
     ipcRenderer.on(PROCESSING_EVENTS.DEBUG_ERROR, subscription)
@@ -168,6 +234,16 @@ contextBridge.exposeInMainWorld("electronAPI", {
       )
     }
   },
+  onProblemPartial: (callback: (data: any) => void) => {
+    const subscription = (_: any, data: any) => callback(data)
+    ipcRenderer.on(PROCESSING_EVENTS.PROBLEM_PARTIAL, subscription)
+    return () => {
+      ipcRenderer.removeListener(
+        PROCESSING_EVENTS.PROBLEM_PARTIAL,
+        subscription
+      )
+    }
+  },
   onUnauthorized: (callback: () => void) => {
     const subscription = () => callback()
     ipcRenderer.on(PROCESSING_EVENTS.UNAUTHORIZED, subscription)
@@ -182,6 +258,19 @@ contextBridge.exposeInMainWorld("electronAPI", {
   analyzeAudioFromBase64: (data: string, mimeType: string) => ipcRenderer.invoke("analyze-audio-base64", data, mimeType),
   analyzeAudioFile: (path: string) => ipcRenderer.invoke("analyze-audio-file", path),
   analyzeImageFile: (path: string) => ipcRenderer.invoke("analyze-image-file", path),
+
+  // Streamed recording
+  startAudioStream: (options: { sampleRate: number }) => ipcRenderer.invoke("audio-stream-start", options),
+  sendAudioChunk: (sessionId: string, chunk: ArrayBuffer) => ipcRenderer.send("audio-stream-chunk", sessionId, chunk),
+  stopAudioStream: (sessionId: string) => ipcRenderer.invoke("audio-stream-stop", sessionId),
+  onAudioSegmentResult: (callback: (data: any) => void) => {
+    const subscription = (_: any, data: any) => callback(data)
+    ipcRenderer.on(PROCESSING_EVENTS.AUDIO_SEGMENT_RESULT, subscription)
+    return () => {
+      ipcRenderer.removeListener(PROCESSING_EVENTS.AUDIO_SEGMENT_RESULT, subscription)
+    }
+  },
+
   quitApp: () => ipcRenderer.invoke("quit-app"),
   
   // LLM Model Management
@@ -190,10 +279,24 @@ contextBridge.exposeInMainWorld("electronAPI", {
   switchToOllama: (model?: string, url?: string) => ipcRenderer.invoke("switch-to-ollama", model, url),
   switchToGemini: (apiKey?: string) => ipcRenderer.invoke("switch-to-gemini", apiKey),
   testLlmConnection: () => ipcRenderer.invoke("test-llm-connection"),
+  getLlmCacheStats: () => ipcRenderer.invoke("get-llm-cache-stats"),
+  clearLlmCache: () => ipcRenderer.invoke("clear-llm-cache"),
+  getWorkerPoolMetrics: () => ipcRenderer.invoke("get-worker-pool-metrics"),
+
+  // Latency tracing
+  getTraceStats: () => ipcRenderer.invoke("get-trace-stats"),
+  resetTraceStats: () => ipcRenderer.invoke("reset-trace-stats"),
+  traceRendered,
 
   // ElevenLabs Scribe STT
   getScribeToken: () => ipcRenderer.invoke("get-scribe-token"),
   geminiChat: (message: string) => ipcRenderer.invoke("gemini-chat", message),
 
+  // Token streaming
+  geminiChatStream: (message: string, onChunk: (chunk: string) => void) =>
+    invokeWithStream<string | null>("gemini-chat-stream", onChunk, message),
+  analyzeImageFileStream: (path: string, onChunk: (chunk: string) => void) =>
+    invokeWithStream<{ text: string; timestamp: number; cancelled?: boolean }>("analyze-image-file-stream", onChunk, path),
+
   invoke: (channel: string, ...args: any[]) => ipcRenderer.invoke(channel, ...args)
 } as ElectronAPI)
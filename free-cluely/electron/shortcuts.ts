@@ -1,5 +1,6 @@
 import { globalShortcut, app } from "electron"
 import { AppState } from "./main" // Adjust the import path if necessary
+import { getTracer } from "./TraceHelper"
 
 export class ShortcutsHelper {
   private appState: AppState
@@ -15,7 +16,7 @@ export class ShortcutsHelper {
       this.appState.centerAndShowWindow()
     })
 
-    globalShortcut.register("CommandOrControl+H", async () => {
+    globalShortcut.register("CommandOrControl+H", () => getTracer().run("take-screenshot", async () => {
       const mainWindow = this.appState.getMainWindow()
       if (mainWindow) {
         console.log("Taking screenshot...")
@@ -30,10 +31,18 @@ export class ShortcutsHelper {
           console.error("Error capturing screenshot:", error)
         }
       }
-    })
+    }))
 
     globalShortcut.register("CommandOrControl+Enter", async () => {
-      await this.appState.processingHelper.processScreenshots()
+      try {
+        await this.appState.processingHelper.processScreenshots()
+      } catch (error: any) {
+        console.error("Error processing screenshots:", error)
+        const mainWindow = this.appState.getMainWindow()
+        if (mainWindow && !mainWindow.isDestroyed()) {
+          mainWindow.webContents.send(this.appState.PROCESSING_EVENTS.INITIAL_SOLUTION_ERROR, error.message)
+        }
+      }
     })
 
     globalShortcut.register("CommandOrControl+R", () => {
@@ -42,7 +51,7 @@ export class ShortcutsHelper {
       )
 
       // Cancel ongoing API requests
-      this.appState.processingHelper.cancelOngoingRequests()
+      this.appState.cancelOngoingRequests()
 
       // Clear both screenshot queues
       this.appState.clearQueues()
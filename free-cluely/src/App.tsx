@@ -32,9 +32,11 @@ declare global {
       onSolutionStart: (callback: () => void) => () => void
       onSolutionError: (callback: (error: string) => void) => () => void
       onSolutionSuccess: (callback: (data: any) => void) => () => void
+      onProblemPartial: (callback: (data: any) => void) => () => void
       onProblemExtracted: (callback: (data: any) => void) => () => void
 
       onDebugSuccess: (callback: (data: any) => void) => () => void
+      onDebugPartial: (callback: (data: any) => void) => () => void
 
       onDebugStart: (callback: () => void) => () => void
       onDebugError: (callback: (error: string) => void) => () => void
@@ -42,6 +44,10 @@ declare global {
       // Audio Processing
       analyzeAudioFromBase64: (data: string, mimeType: string) => Promise<{ text: string; timestamp: number }>
       analyzeAudioFile: (path: string) => Promise<{ text: string; timestamp: number }>
+      startAudioStream: (options: { sampleRate: number }) => Promise<string>
+      sendAudioChunk: (sessionId: string, chunk: ArrayBuffer) => void
+      stopAudioStream: (sessionId: string) => Promise<Array<{ sessionId: string; index: number; text: string; timestamp: number; durationMs: number }>>
+      onAudioSegmentResult: (callback: (data: { sessionId: string; index: number; text: string; timestamp: number; durationMs: number }) => void) => () => void
 
       moveWindowLeft: () => Promise<void>
       moveWindowRight: () => Promise<void>
@@ -55,11 +61,21 @@ declare global {
       switchToOllama: (model?: string, url?: string) => Promise<{ success: boolean; error?: string }>
       switchToGemini: (apiKey?: string) => Promise<{ success: boolean; error?: string }>
       testLlmConnection: () => Promise<{ success: boolean; error?: string }>
+      getLlmCacheStats: () => Promise<{ hits: number; nearHits: number; misses: number; entries: number } | null>
+      clearLlmCache: () => Promise<{ success: boolean; error?: string }>
+      getWorkerPoolMetrics: () => Promise<{ size: number; busy: number; queueDepth: number; completed: number; failed: number; avgLatencyMs: number; p95LatencyMs: number }>
+      getTraceStats: () => Promise<Record<string, { count: number; p50Ms: number; p95Ms: number; lastMs: number }>>
+      resetTraceStats: () => Promise<{ success: boolean }>
+      traceRendered: (key: string) => void
 
       // ElevenLabs Scribe STT
       getScribeToken: () => Promise<{ success: boolean; token?: string; error?: string }>
       geminiChat: (message: string) => Promise<string>
 
+      // Token streaming
+      geminiChatStream: (message: string, onChunk: (chunk: string) => void) => Promise<string | null>
+      analyzeImageFileStream: (path: string, onChunk: (chunk: string) => void) => Promise<{ text: string; timestamp: number; cancelled?: boolean }>
+
       invoke: (channel: string, ...args: any[]) => Promise<any>
     }
   }
@@ -156,11 +172,16 @@ const App: React.FC = () => {
         setView("queue")
         console.log("View reset to 'queue' via Command+R shortcut")
       }),
+      window.electronAPI.onProblemPartial((data: any) => {
+        // Render the answer as it streams in; PROBLEM_EXTRACTED replaces it when done
+        queryClient.setQueryData(["problem_statement"], data)
+      }),
       window.electronAPI.onProblemExtracted((data: any) => {
         if (view === "queue") {
           console.log("Problem extracted successfully")
           queryClient.invalidateQueries(["problem_statement"])
           queryClient.setQueryData(["problem_statement"], data)
+          window.electronAPI.traceRendered("problem-extracted")
         }
       })
     ]
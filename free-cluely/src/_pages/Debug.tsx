@@ -268,25 +268,35 @@ const Debug: React.FC<DebugProps> = ({ isProcessing, setIsProcessing }) => {
   }
 
   useEffect(() => {
-    // Try to get the new solution data from cache first
-    const newSolution = queryClient.getQueryData(["new_solution"]) as {
-      old_code: string
-      new_code: string
-      thoughts: string[]
-      time_complexity: string
-      space_complexity: string
-    } | null
-
-    // If we have cached data, set all state variables to the cached data
-    if (newSolution) {
+    // The debug answer in the cache; partials update it while it streams
+    const loadNewSolution = () => {
+      const newSolution = queryClient.getQueryData(["new_solution"]) as {
+        old_code?: string
+        new_code?: string
+        code?: string
+        thoughts?: string[]
+        suggested_responses?: string[]
+        time_complexity?: string
+        space_complexity?: string
+      } | null
+      if (!newSolution) return
+
       setOldCode(newSolution.old_code || null)
-      setNewCode(newSolution.new_code || null)
-      setThoughtsData(newSolution.thoughts || null)
+      setNewCode(newSolution.new_code || newSolution.code || null)
+      setThoughtsData(newSolution.thoughts || newSolution.suggested_responses || null)
       setTimeComplexityData(newSolution.time_complexity || null)
       setSpaceComplexityData(newSolution.space_complexity || null)
-      setIsProcessing(false)
     }
 
+    // If we have cached data, set all state variables to the cached data.
+    // Processing state is left to DEBUG_SUCCESS/DEBUG_ERROR: the view can
+    // mount on the first partial while the answer is still streaming.
+    loadNewSolution()
+
+    const unsubscribe = queryClient.getQueryCache().subscribe((event) => {
+      if (event?.query.queryKey[0] === "new_solution") loadNewSolution()
+    })
+
     // Set up event listeners
     const cleanupFunctions = [
       window.electronAPI.onScreenshotTaken(() => refetch()),
@@ -330,6 +340,7 @@ const Debug: React.FC<DebugProps> = ({ isProcessing, setIsProcessing }) => {
     updateDimensions()
 
     return () => {
+      unsubscribe()
       resizeObserver.disconnect()
       cleanupFunctions.forEach((cleanup) => cleanup())
     }
@@ -10,6 +10,7 @@ import {
 } from "../components/ui/toast"
 import QueueCommands from "../components/Queue/QueueCommands"
 import ModelSelector from "../components/ui/ModelSelector"
+import LatencyStats from "../components/ui/LatencyStats"
 
 interface QueueProps {
   setView: React.Dispatch<React.SetStateAction<"queue" | "solutions" | "debug">>
@@ -28,7 +29,7 @@ const Queue: React.FC<QueueProps> = ({ setView }) => {
   const contentRef = useRef<HTMLDivElement>(null)
 
   const [chatInput, setChatInput] = useState("")
-  const [chatMessages, setChatMessages] = useState<{role: "user"|"gemini", text: string}[]>([])
+  const [chatMessages, setChatMessages] = useState<{role: "user"|"gemini", text: string, replyId?: number, cancelled?: boolean}[]>([])
   const [chatLoading, setChatLoading] = useState(false)
   const [isChatOpen, setIsChatOpen] = useState(false)
   const chatInputRef = useRef<HTMLInputElement>(null)
@@ -37,6 +38,7 @@ const Queue: React.FC<QueueProps> = ({ setView }) => {
   const [currentModel, setCurrentModel] = useState<{ provider: string; model: string }>({ provider: "gemini", model: "gemini-3-pro-preview" })
 
   const barRef = useRef<HTMLDivElement>(null)
+  const nextReplyId = useRef(0)
 
   const { data: screenshots = [], refetch } = useQuery<Array<{ path: string; preview: string }>, Error>(
     ["screenshots"],
@@ -86,16 +88,49 @@ const Queue: React.FC<QueueProps> = ({ setView }) => {
     }
   }
 
+  // Streams a model reply into a new chat bubble, token by token. A null result
+  // means the request was cancelled: nothing is shown, or a half-streamed
+  // bubble is marked as cancelled.
+  const streamReply = async (request: (onChunk: (chunk: string) => void) => Promise<string | null>) => {
+    // Chunks go to this reply's own bubble, even if another reply streams meanwhile
+    const replyId = nextReplyId.current++
+    let started = false
+    const onChunk = (chunk: string) => {
+      if (!started) {
+        started = true
+        setChatLoading(false)
+        setChatMessages((msgs) => [...msgs, { role: "gemini", text: chunk, replyId }])
+        return
+      }
+      setChatMessages((msgs) =>
+        msgs.map((msg) => (msg.replyId === replyId ? { ...msg, text: msg.text + chunk } : msg))
+      )
+    }
+
+    try {
+      const text = await request(onChunk)
+      if (text === null) {
+        if (started) {
+          setChatMessages((msgs) =>
+            msgs.map((msg) => (msg.replyId === replyId ? { ...msg, cancelled: true } : msg))
+          )
+        }
+      } else if (!started) {
+        setChatMessages((msgs) => [...msgs, { role: "gemini", text }])
+      }
+    } catch (err) {
+      setChatMessages((msgs) => [...msgs, { role: "gemini", text: "Error: " + String(err) }])
+    }
+  }
+
   const handleChatSend = async () => {
     if (!chatInput.trim()) return
-    setChatMessages((msgs) => [...msgs, { role: "user", text: chatInput }])
+    const message = chatInput
+    setChatMessages((msgs) => [...msgs, { role: "user", text: message }])
     setChatLoading(true)
     setChatInput("")
     try {
-      const response = await window.electronAPI.invoke("gemini-chat", chatInput)
-      setChatMessages((msgs) => [...msgs, { role: "gemini", text: response }])
-    } catch (err) {
-      setChatMessages((msgs) => [...msgs, { role: "gemini", text: "Error: " + String(err) }])
+      await streamReply((onChunk) => window.electronAPI.geminiChatStream(message, onChunk))
     } finally {
       setChatLoading(false)
       chatInputRef.current?.focus()
@@ -175,12 +210,13 @@ const Queue: React.FC<QueueProps> = ({ setView }) => {
         // Get the latest screenshot path
         const latest = data?.path || (Array.isArray(data) && data.length > 0 && data[data.length - 1]?.path);
         if (latest) {
-          // Call the LLM to process the screenshot
-          const response = await window.electronAPI.invoke("analyze-image-file", latest);
-          setChatMessages((msgs) => [...msgs, { role: "gemini", text: response.text }]);
+          // Call the LLM to process the screenshot, rendering tokens as they arrive
+          await streamReply(async (onChunk) => {
+            const response = await window.electronAPI.analyzeImageFileStream(latest, onChunk);
+            // Superseded by a newer screenshot
+            return response.cancelled ? null : response.text;
+          });
         }
-      } catch (err) {
-        setChatMessages((msgs) => [...msgs, { role: "gemini", text: "Error: " + String(err) }]);
       } finally {
         setChatLoading(false);
       }
@@ -247,6 +283,9 @@ const Queue: React.FC<QueueProps> = ({ setView }) => {
           {isSettingsOpen && (
             <div className="mt-4 w-full mx-auto">
               <ModelSelector onModelChange={handleModelChange} onChatOpen={() => setIsChatOpen(true)} />
+              <div className="mt-2">
+                <LatencyStats />
+              </div>
             </div>
           )}
           
@@ -276,7 +315,10 @@ const Queue: React.FC<QueueProps> = ({ setView }) => {
                       }`}
                       style={{ wordBreak: "break-word", lineHeight: "1.4" }}
                     >
-                      {msg.text}
+                      <span className={msg.cancelled ? "opacity-60" : undefined}>{msg.text}</span>
+                      {msg.cancelled && (
+                        <span className="block mt-1 italic text-gray-400">Cancelled</span>
+                      )}
                     </div>
                   </div>
                 ))
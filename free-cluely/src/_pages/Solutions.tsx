@@ -137,6 +137,9 @@ const Solutions: React.FC<SolutionsProps> = ({ setView }) => {
   const [audioResult, setAudioResult] = useState<AudioResult | null>(null)
 
   const [debugProcessing, setDebugProcessing] = useState(false)
+  const [hasNewSolution, setHasNewSolution] = useState(
+    () => !!queryClient.getQueryData(["new_solution"])
+  )
   const [problemStatementData, setProblemStatementData] =
     useState<ProblemStatementData | null>(null)
   const [solutionData, setSolutionData] = useState<string | null>(null)
@@ -346,12 +349,19 @@ const Solutions: React.FC<SolutionsProps> = ({ setView }) => {
         //we'll set the debug processing state to true and use that to render a little loader
         setDebugProcessing(true)
       }),
+      //fields of the debug answer as they stream in; DEBUG_SUCCESS replaces them when done
+      window.electronAPI.onDebugPartial((data) => {
+        if (data?.solution) {
+          queryClient.setQueryData(["new_solution"], data.solution)
+        }
+      }),
       //the first time debugging works, we'll set the view to debug and populate the cache with the data
       window.electronAPI.onDebugSuccess((data) => {
         console.log({ debug_data: data })
 
         queryClient.setQueryData(["new_solution"], data.solution)
         setDebugProcessing(false)
+        window.electronAPI.traceRendered("debug-success")
       }),
       //when there was an error in the initial debugging, we'll show a toast and stop the little generating pulsing thing.
       window.electronAPI.onDebugError(() => {
@@ -417,6 +427,10 @@ const Solutions: React.FC<SolutionsProps> = ({ setView }) => {
           setSpaceComplexityData(null);
         }
       }
+      if (event?.query.queryKey[0] === "new_solution") {
+        // Switch to the Debug view as soon as the first partial arrives
+        setHasNewSolution(!!queryClient.getQueryData(["new_solution"]))
+      }
       if (event?.query.queryKey[0] === "solution") {
         const solution = queryClient.getQueryData(["solution"]) as {
           code: string
@@ -441,7 +455,7 @@ const Solutions: React.FC<SolutionsProps> = ({ setView }) => {
 
   return (
     <>
-      {!isResetting && queryClient.getQueryData(["new_solution"]) ? (
+      {!isResetting && hasNewSolution ? (
         <>
           <Debug
             isProcessing={debugProcessing}
@@ -0,0 +1,83 @@
+import React, { useState, useEffect } from 'react';
+
+interface StageStats {
+  count: number;
+  p50Ms: number;
+  p95Ms: number;
+  lastMs: number;
+}
+
+const REFRESH_INTERVAL_MS = 2000;
+
+// p50/p95 per pipeline stage (capture -> encode -> request -> first token -> parse -> render)
+const LatencyStats: React.FC = () => {
+  const [stats, setStats] = useState<Record<string, StageStats>>({});
+
+  useEffect(() => {
+    let cancelled = false;
+
+    const loadStats = async () => {
+      try {
+        const result = await window.electronAPI.getTraceStats();
+        if (!cancelled) setStats(result);
+      } catch (error) {
+        console.error('Error loading latency stats:', error);
+      }
+    };
+
+    loadStats();
+    const interval = setInterval(loadStats, REFRESH_INTERVAL_MS);
+    return () => {
+      cancelled = true;
+      clearInterval(interval);
+    };
+  }, []);
+
+  const handleReset = async () => {
+    await window.electronAPI.resetTraceStats();
+    setStats({});
+  };
+
+  const rows = Object.entries(stats).sort(([a], [b]) => a.localeCompare(b));
+
+  return (
+    <div className="p-4 bg-white/20 backdrop-blur-md rounded-lg border border-white/30 space-y-2">
+      <div className="flex items-center justify-between">
+        <h3 className="text-sm font-semibold text-gray-800">Latency</h3>
+        <button
+          onClick={handleReset}
+          className="px-2 py-1 text-xs bg-white/60 hover:bg-white/80 rounded transition-all"
+        >
+          Reset
+        </button>
+      </div>
+
+      {rows.length === 0 ? (
+        <div className="text-xs text-gray-600">No requests traced yet.</div>
+      ) : (
+        <table className="w-full text-xs text-gray-700">
+          <thead>
+            <tr className="text-left text-gray-600">
+              <th className="font-medium">Stage</th>
+              <th className="font-medium text-right">p50</th>
+              <th className="font-medium text-right">p95</th>
+              <th className="font-medium text-right">n</th>
+            </tr>
+          </thead>
+          <tbody>
+            {rows.map(([stage, value]) => (
+              <tr key={stage}>
+                <td className="pr-2 truncate">{stage}</td>
+                <td className="text-right">{value.p50Ms} ms</td>
+                <td className="text-right">{value.p95Ms} ms</td>
+                <td className="text-right">{value.count}</td>
+              </tr>
+            ))}
+          </tbody>
+        </table>
+      )}
+    </div>
+  );
+};
+
+export default LatencyStats;
@@ -11,10 +11,12 @@ export interface ElectronAPI {
   onSolutionStart: (callback: () => void) => () => void
   onDebugStart: (callback: () => void) => () => void
   onDebugSuccess: (callback: (data: any) => void) => () => void
+  onDebugPartial: (callback: (data: any) => void) => () => void
   onSolutionError: (callback: (error: string) => void) => () => void
   onProcessingNoScreenshots: (callback: () => void) => () => void
   onProblemExtracted: (callback: (data: any) => void) => () => void
   onSolutionSuccess: (callback: (data: any) => void) => () => void
+  onProblemPartial: (callback: (data: any) => void) => () => void
   onUnauthorized: (callback: () => void) => () => void
   onDebugError: (callback: (error: string) => void) => () => void
   takeScreenshot: () => Promise<void>
@@ -24,12 +26,26 @@ export interface ElectronAPI {
   moveWindowDown: () => Promise<void>
   analyzeAudioFromBase64: (data: string, mimeType: string) => Promise<{ text: string; timestamp: number }>
   analyzeAudioFile: (path: string) => Promise<{ text: string; timestamp: number }>
+  startAudioStream: (options: { sampleRate: number }) => Promise<string>
+  sendAudioChunk: (sessionId: string, chunk: ArrayBuffer) => void
+  stopAudioStream: (sessionId: string) => Promise<Array<{ sessionId: string; index: number; text: string; timestamp: number; durationMs: number }>>
+  onAudioSegmentResult: (callback: (data: { sessionId: string; index: number; text: string; timestamp: number; durationMs: number }) => void) => () => void
+  getLlmCacheStats: () => Promise<{ hits: number; nearHits: number; misses: number; entries: number } | null>
+  clearLlmCache: () => Promise<{ success: boolean; error?: string }>
+  getWorkerPoolMetrics: () => Promise<{ size: number; busy: number; queueDepth: number; completed: number; failed: number; avgLatencyMs: number; p95LatencyMs: number }>
+  getTraceStats: () => Promise<Record<string, { count: number; p50Ms: number; p95Ms: number; lastMs: number }>>
+  resetTraceStats: () => Promise<{ success: boolean }>
+  traceRendered: (key: string) => void
   quitApp: () => Promise<void>
 
   // ElevenLabs Scribe STT
   getScribeToken: () => Promise<{ success: boolean; token?: string; error?: string }>
   geminiChat: (message: string) => Promise<string>
 
+  // Token streaming
+  geminiChatStream: (message: string, onChunk: (chunk: string) => void) => Promise<string | null>
+  analyzeImageFileStream: (path: string, onChunk: (chunk: string) => void) => Promise<{ text: string; timestamp: number; cancelled?: boolean }>
+
   invoke: (channel: string, ...args: any[]) => Promise<any>
 }
 
@@ -0,0 +1,111 @@
+// Hit-correctness checks for the response cache image keys:
+//
+//   node worker-script/node/imageHash.check.js
+//
+// Synthetic screens share one IDE-like layout (title bar, file tree, code
+// pane, problem pane) and differ only in the problem text, the case where a
+// cache hit would serve the previous problem's answer.
+
+const assert = require('assert');
+const { HASH_SIZE, getSharp, contentHash, perceptualHash, hammingDistance } = require('./imageHash');
+
+const WIDTH = 1920;
+const HEIGHT = 1080;
+// A cursor blink must stay within this many bits to be worth opting in...
+const MAX_CURSOR_DISTANCE = 8;
+// ...and different text in the same layout must be far outside it
+const MIN_DIFFERENT_TEXT_DISTANCE = 64;
+
+// Deterministic PRNG (mulberry32) so every run draws the same screens
+function random(seed) {
+  let state = seed >>> 0;
+  return () => {
+    state = (state + 0x6d2b79f5) >>> 0;
+    let t = state;
+    t = Math.imul(t ^ (t >>> 15), t | 1);
+    t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+  };
+}
+
+function fillRect(pixels, x0, y0, x1, y1, value) {
+  for (let y = Math.max(0, y0); y < Math.min(HEIGHT, y1); y++) {
+    pixels.fill(value, y * WIDTH + Math.max(0, x0), y * WIDTH + Math.min(WIDTH, x1));
+  }
+}
+
+// Lines of glyph-like strokes; no fonts needed
+function drawText(pixels, { x0, x1, y0, lines, lineHeight, seed, value }) {
+  const next = random(seed);
+  for (let line = 0; line < lines; line++) {
+    const y = y0 + line * lineHeight;
+    for (let x = x0; ; ) {
+      const letters = Math.floor(3 + next() * 8);
+      if (x + letters * 9 > x1) break;
+      for (let letter = 0; letter < letters; letter++) {
+        const strokes = Math.floor(1 + next() * 3);
+        for (let stroke = 0; stroke < strokes; stroke++) {
+          const left = x + letter * 9 + stroke * 2;
+          fillRect(pixels, left, y + Math.floor(next() * 6), left + 1, y + 14, value);
+        }
+      }
+      x += letters * 9 + 9;
+    }
+  }
+}
+
+function screen(problemSeed, { cursor = false } = {}) {
+  const pixels = new Uint8Array(WIDTH * HEIGHT).fill(30);
+  fillRect(pixels, 0, 0, WIDTH, 40, 52);
+  fillRect(pixels, 0, 40, 300, HEIGHT, 38);
+  fillRect(pixels, 960, 40, WIDTH, HEIGHT, 26);
+  drawText(pixels, { x0: 20, x1: 280, y0: 60, lines: 30, lineHeight: 30, seed: 1, value: 190 });
+  drawText(pixels, { x0: 330, x1: 940, y0: 60, lines: 30, lineHeight: 32, seed: 2, value: 160 });
+  drawText(pixels, { x0: 990, x1: 1900, y0: 70, lines: 28, lineHeight: 34, seed: problemSeed, value: 220 });
+  if (cursor) fillRect(pixels, 500, 500, 502, 520, 255);
+
+  // PNG bytes, as captured
+  return getSharp()(Buffer.from(pixels), { raw: { width: WIDTH, height: HEIGHT, channels: 1 } }).png().toBuffer();
+}
+
+async function keys(png) {
+  return { exact: await contentHash(png), near: await perceptualHash(png) };
+}
+
+async function main() {
+  const problem = await keys(await screen(100));
+  const sameScreen = await keys(await screen(100));
+  const cursorBlink = await keys(await screen(100, { cursor: true }));
+  const otherProblems = await Promise.all([101, 102, 103].map(async (seed) => keys(await screen(seed))));
+
+  assert.strictEqual(problem.near.length, (HASH_SIZE * HASH_SIZE) / 4, 'perceptual hash size');
+
+  // Default (exact) matching: only an unchanged screen hits
+  assert.strictEqual(sameScreen.exact, problem.exact, 'unchanged screen must hit');
+  assert.notStrictEqual(cursorBlink.exact, problem.exact, 'exact key must change with any pixel');
+  for (const other of otherProblems) {
+    assert.notStrictEqual(other.exact, problem.exact, 'different problem text must miss');
+  }
+
+  // Opt-in near-duplicate matching
+  assert.strictEqual(hammingDistance(sameScreen.near, problem.near), 0, 'unchanged screen distance');
+  const cursorDistance = hammingDistance(cursorBlink.near, problem.near);
+  assert.ok(cursorDistance <= MAX_CURSOR_DISTANCE, `cursor blink distance ${cursorDistance} > ${MAX_CURSOR_DISTANCE}`);
+  for (const other of otherProblems) {
+    const distance = hammingDistance(other.near, problem.near);
+    assert.ok(
+      distance >= MIN_DIFFERENT_TEXT_DISTANCE,
+      `same layout, different text: distance ${distance} < ${MIN_DIFFERENT_TEXT_DISTANCE}`
+    );
+  }
+
+  console.log(
+    `imageHash checks passed (cursor ${cursorDistance} bits, different text ` +
+      `${otherProblems.map((other) => hammingDistance(other.near, problem.near)).join('/')} of ${HASH_SIZE * HASH_SIZE} bits)`
+  );
+}
+
+main().catch((error) => {
+  console.error(error);
+  process.exit(1);
+});
@@ -0,0 +1,64 @@
+const crypto = require('crypto');
+const fs = require('fs');
+
+// dHash grid: HASH_SIZE x HASH_SIZE bits (1024). At 9x8 (64 bits) different
+// problems in the same IDE or browser layout hashed within a few bits of each
+// other; at this size different text in the same layout differs in dozens.
+const HASH_SIZE = 32;
+
+// sharp is loaded on first image job so audio/JSON-only workers start fast
+let sharp = null;
+function getSharp() {
+  if (!sharp) sharp = require('sharp');
+  return sharp;
+}
+
+// Exact identity of the captured image: the cache's default key, so only an
+// unchanged screen can reuse a previous answer
+async function contentHash(source) {
+  const bytes = typeof source === 'string' ? await fs.promises.readFile(source) : source;
+  return crypto.createHash('sha256').update(bytes).digest('hex');
+}
+
+// dHash: compares neighbouring pixels of a greyscale copy, so small changes
+// (cursor, clock) flip few bits while a different screen flips many. Only
+// used for opt-in near-duplicate matching: edits as small as one changed
+// number do not show at this resolution.
+async function perceptualHash(source) {
+  const pixels = await getSharp()(source)
+    .grayscale()
+    .resize(HASH_SIZE + 1, HASH_SIZE, { fit: 'fill' })
+    .raw()
+    .toBuffer();
+
+  let hash = '';
+  let nibble = 0;
+  for (let row = 0; row < HASH_SIZE; row++) {
+    for (let col = 0; col < HASH_SIZE; col++) {
+      const index = row * (HASH_SIZE + 1) + col;
+      const bit = pixels[index] > pixels[index + 1] ? 1 : 0;
+      nibble = (nibble << 1) | bit;
+      if (col % 4 === 3) {
+        hash += nibble.toString(16);
+        nibble = 0;
+      }
+    }
+  }
+  return hash;
+}
+
+// Number of differing bits between two equal-length hex hashes
+function hammingDistance(a, b) {
+  if (a.length !== b.length) return Infinity;
+  let distance = 0;
+  for (let i = 0; i < a.length; i++) {
+    let diff = parseInt(a[i], 16) ^ parseInt(b[i], 16);
+    while (diff) {
+      distance += diff & 1;
+      diff >>= 1;
+    }
+  }
+  return distance;
+}
+
+module.exports = { HASH_SIZE, getSharp, contentHash, perceptualHash, hammingDistance };
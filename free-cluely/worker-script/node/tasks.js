@@ -0,0 +1,58 @@
+const fs = require('fs');
+const { getSharp, contentHash, perceptualHash } = require('./imageHash');
+
+// Job handlers shared by the worker thread (index.js) and the pool's inline
+// fallback on the main thread, used when workers keep crashing
+
+async function processTask(data) {
+  switch (data.kind) {
+    case 'encode-image':
+      return encodeImage(data);
+    case 'encode-file':
+      return (await fs.promises.readFile(data.path)).toString('base64');
+    case 'encode-buffer':
+      return Buffer.from(data.buffer).toString('base64');
+    case 'parse-json':
+      return parseJson(data.text);
+    default:
+      throw new Error(`Unknown job kind: ${data.kind}`);
+  }
+}
+
+// Input is either a file path or a transferred ArrayBuffer with the PNG bytes
+function imageInput(input) {
+  return typeof input === 'string' ? input : Buffer.from(input);
+}
+
+async function encodeImage({ input, maxEdge, format, quality, thumbnailEdge }) {
+  const source = imageInput(input);
+  const resize = (edge) => ({ width: edge, height: edge, fit: 'inside', withoutEnlargement: true });
+
+  const modelPipeline = getSharp()(source).resize(resize(maxEdge));
+  const [modelBuffer, thumbnailBuffer, hash, nearHash] = await Promise.all([
+    format === 'jpeg'
+      ? modelPipeline.jpeg({ quality }).toBuffer()
+      : modelPipeline.webp({ quality }).toBuffer(),
+    getSharp()(source).resize(resize(thumbnailEdge)).jpeg({ quality: 70 }).toBuffer(),
+    contentHash(source),
+    perceptualHash(source)
+  ]);
+
+  return {
+    modelImage: {
+      data: modelBuffer.toString('base64'),
+      mimeType: `image/${format}`,
+      hash,
+      perceptualHash: nearHash
+    },
+    thumbnail: `data:image/jpeg;base64,${thumbnailBuffer.toString('base64')}`
+  };
+}
+
+// Same cleanup as LLMHelper.cleanJsonResponse, then parse
+function parseJson(text) {
+  const cleaned = text.replace(/^```(?:json)?\n/, '').replace(/\n```$/, '').trim();
+  return JSON.parse(cleaned);
+}
+
+module.exports = { processTask };